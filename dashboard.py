@@ -1,12 +1,22 @@
 import streamlit as st
-import pandas as pd
 import json
 import os
 import shutil
+import sys
 from pathlib import Path
 import openai
+import pyarrow.compute as pc
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from artifacts import read_table, find_artifact
+from scoring import DEFAULT_WEIGHTS, rerank
+from ranking_query import (
+    ENTITY_COLUMNS, RELEVANCE_COLUMN, SORTABLE_COLUMNS, build_candidate_table, distinct_values, query_candidates,
+    with_relevance
+)
+from search_index import SearchIndex
+
 st.set_page_config(page_title="CV Analyzer Dashboard", layout="wide")
 st.title("CV Analyzer Dashboard")
 
@@ -15,7 +25,47 @@ data_dir = "outputs"
 plots_dir = os.path.join(data_dir, "plots")
 text_dir = os.path.join(data_dir, "text")
 entities_path = os.path.join(data_dir, "entities.json")
-ranking_path = os.path.join(data_dir, "ranking.csv")
+ranking_stem = Path(data_dir) / "ranking"  # ranking.parquet preferred, ranking.csv as fallback
+components_stem = Path(data_dir) / "components"
+entities_stem = Path(data_dir) / "entities"
+search_db = Path(data_dir) / "search.db"
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_artifact(path: str, mtime: float):
+    # mtime is part of the cache key so a re-run invalidates the cached table; max_entries
+    # evicts the superseded versions left behind by daemon batches and uploads
+    return read_table(Path(path))
+
+
+def cached_artifact(stem: Path, preferred=(".parquet", ".arrow", ".csv", ".json")):
+    path = find_artifact(stem, preferred)
+    return load_artifact(str(path), path.stat().st_mtime) if path else None
+
+
+def current_candidates(weights):
+    """
+    Candidate table under the sidebar weights: re-ranked from cached component scores when
+    available (otherwise the pipeline's ranking), joined with entity fields by file.
+    """
+    components = cached_artifact(components_stem)
+    ranking = rerank(components, weights) if components is not None else cached_artifact(ranking_stem)
+    if ranking is None:
+        return None
+    entities = cached_artifact(entities_stem, (".parquet", ".json"))
+    if entities is not None:
+        entities = entities.select(["file"] + ENTITY_COLUMNS)
+    return build_candidate_table(ranking, entities)
+
+
+@st.cache_resource(show_spinner=False)
+def open_search_index(path: str):
+    return SearchIndex(Path(path))
+
+
+def load_vacancy():
+    with open("outputs/vacancy.json", "r", encoding="utf-8") as f:
+        return json.load(f)
 
 # Sidebar for file upload and pipeline run
 st.sidebar.header("Upload Documents")
@@ -24,36 +74,111 @@ vacancy_uploaded = st.sidebar.file_uploader("Upload Vacancy (PDF/DOCX/TXT)", typ
 
 run_pipeline = st.sidebar.button("Run Analysis")
 
-# Save uploaded files to data dirs if provided
+# Score weights; re-ranking uses cached component scores, so no pipeline re-run is needed
+st.sidebar.header("Score Weights")
+weights = {
+    "skills": st.sidebar.slider("Skills", 0.0, 1.0, DEFAULT_WEIGHTS["skills"], 0.05),
+    "experience": st.sidebar.slider("Experience", 0.0, 1.0, DEFAULT_WEIGHTS["experience"], 0.05),
+    "education": st.sidebar.slider("Education", 0.0, 1.0, DEFAULT_WEIGHTS["education"], 0.05),
+}
+
+# Raw uploads are kept only when a retention folder is configured (e.g. UPLOAD_RETENTION_DIR=data/cvs in .env)
+load_dotenv()
+retain_dir = os.getenv("UPLOAD_RETENTION_DIR")
 cvs_dir = Path("data/cvs")
 vacancy_dir = Path("data/job")
-cvs_dir.mkdir(parents=True, exist_ok=True)
-vacancy_dir.mkdir(parents=True, exist_ok=True)
+vacancy_json = Path(data_dir) / "vacancy.json"
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def ranking_state(vacancy_mtime: float):
+    # Imported lazily: loads spaCy once, on the first in-memory upload
+    from incremental import RankingState
+    return RankingState(Path(data_dir), vacancy_json, search_index=search_db)
 
-if cvs_uploaded:
-    for file in cvs_uploaded:
-        with open(cvs_dir / file.name, "wb") as f:
-            f.write(file.getbuffer())
-if vacancy_uploaded:
-    with open(vacancy_dir / vacancy_uploaded.name, "wb") as f:
-        f.write(vacancy_uploaded.getbuffer())
 
 if run_pipeline:
-    # Run the full pipeline using main.py for production robustness
-    os.system("python main.py")
+    if cvs_uploaded and not vacancy_uploaded and vacancy_json.exists():
+        # New CVs against the current vacancy: extract, parse and score in-process from the upload buffers
+        state = ranking_state(vacancy_json.stat().st_mtime)
+        # Locked against the ingestion daemon; refresh() reloads outputs rewritten since the state was cached
+        with state.lock():
+            state.refresh()
+            for file in cvs_uploaded:
+                try:
+                    state.ingest_bytes(file.getbuffer(), file.name, retain_dir)
+                except Exception as e:
+                    st.sidebar.error(f"Could not process {file.name}: {e}")
+            state.save()
+    else:
+        # A new vacancy re-scores the whole pool, so run the full pipeline from the data folders
+        cvs_dir.mkdir(parents=True, exist_ok=True)
+        vacancy_dir.mkdir(parents=True, exist_ok=True)
+        for file in cvs_uploaded or []:
+            with open(cvs_dir / file.name, "wb") as f:
+                f.write(file.getbuffer())
+        if vacancy_uploaded:
+            with open(vacancy_dir / vacancy_uploaded.name, "wb") as f:
+                f.write(vacancy_uploaded.getbuffer())
+        os.system("python main.py")
+        ranking_state.clear()
     st.success("Analysis complete! See results below.")
 
 # Tabs for dashboard sections
 ranking_tab, vacancy_tab, detail_tab = st.tabs(["Ranked Shortlist", "Vacancy Details", "Detail"])
 
+page_rows = []  # candidates on the current shortlist page, shared with the detail tab
+
 with ranking_tab:
     st.header("Ranked Shortlist")
-    if os.path.exists(ranking_path):
-        df = pd.read_csv(ranking_path)
-        display_columns = ["name", "Score", "Skill Matches", "Education Field"]  # Removed 'Years of Experiences'
-        # Only show columns that exist
-        display_columns = [col for col in display_columns if col in df.columns]
-        st.dataframe(df[display_columns].head(10), use_container_width=True)
+    candidates = current_candidates(weights)
+    text_query = st.text_input("Full-text Search", placeholder='e.g. BIM coordinator Revit "site supervisor"')
+    if candidates is not None and text_query.strip():
+        if search_db.exists():
+            # Top hits by BM25; the filters below then apply within them
+            hits = open_search_index(str(search_db)).search(text_query, limit=1000, snippets=False)
+            candidates = with_relevance(candidates, hits)
+        else:
+            st.info("Search index not built yet; run the analysis first.")
+    if candidates is not None:
+        try:
+            vacancy_reqs = load_vacancy()
+            vacancy_skills = vacancy_reqs.get("required_skills", []) + vacancy_reqs.get("nice_to_have_skills", [])
+        except Exception:
+            vacancy_skills = []
+        max_exp = max(pc.max(candidates.column("Years of Experiences")).as_py() or 0.0, 1.0)
+        max_score = max(pc.max(candidates.column("Score")).as_py() or 0.0, 1.0)  # weights may sum above 1
+        f1, f2, f3 = st.columns(3)
+        score_range = f1.slider("Score", 0.0, max_score, (0.0, max_score), 0.01)
+        exp_range = f2.slider("Years of Experience", 0.0, max_exp, (0.0, max_exp), 0.5)
+        field = f3.selectbox("Education Field", ["Any"] + distinct_values(candidates, "Education Field"))
+        s1, s2, s3, s4 = st.columns([3, 2, 2, 1])
+        required = s1.multiselect("Required Skills Present", sorted({s.lower() for s in vacancy_skills}))
+        search = s2.text_input("Search Name or File")
+        searching = RELEVANCE_COLUMN in candidates.column_names
+        sort_by = s3.selectbox("Sort By", ([RELEVANCE_COLUMN] if searching else []) + SORTABLE_COLUMNS)
+        descending = s4.checkbox("Descending", value=True)
+        p1, p2 = st.columns([1, 5])
+        page_size = p1.selectbox("Rows per Page", [10, 25, 50, 100])
+        page = p1.number_input("Page", min_value=1, value=1, step=1)
+        filters = dict(
+            min_score=score_range[0], max_score=score_range[1],
+            skills=required, field=None if field == "Any" else field,
+            min_experience=exp_range[0], max_experience=exp_range[1],
+            search=search, sort_by=sort_by, descending=descending
+        )
+        page_table, total = query_candidates(candidates, **filters, page=page - 1, page_size=page_size)
+        pages = max(-(-total // page_size), 1)
+        if page > pages:
+            # Narrower filters left fewer pages than the one selected: show the last page instead
+            page = pages
+            page_table, total = query_candidates(candidates, **filters, page=page - 1, page_size=page_size)
+        page_rows = page_table.to_pylist()
+        display_columns = ["file", "name", "Score", "Skill Matches", "Education Field"]  # Removed 'Years of Experiences'
+        if searching:
+            display_columns.append(RELEVANCE_COLUMN)
+        p2.caption(f"{total} matching candidates, page {page} of {pages}")
+        p2.dataframe(page_table.select(display_columns).to_pandas().set_index("file"), use_container_width=True)
     else:
         st.warning("ranking not found.")
 
@@ -88,7 +213,6 @@ with vacancy_tab:
         st.error(f"Could not load vacancy.json: {e}")
 
 # Load OpenAI API key
-load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
 def gpt_deep_analysis(cv_text, vacancy_text):
@@ -116,36 +240,26 @@ def gpt_deep_analysis(cv_text, vacancy_text):
         return f"[GPT analysis failed: {e}]"
 
 with detail_tab:
-    st.header("Candidate Details (Top 10)")
+    st.header("Candidate Details (Current Page)")
     try:
-        with open("outputs/entities.json", "r", encoding="utf-8") as f:
-            entities = json.load(f)
-        with open("outputs/vacancy.json", "r", encoding="utf-8") as f:
-            vacancy = json.load(f)
+        vacancy = load_vacancy()
         required_skills = set([s.lower() for s in vacancy.get("required_skills", [])])
-        # Load top 10 from ranking.csv, sorted by Score descending
-        import pandas as pd
-        top_df = pd.read_csv("outputs/ranking.csv").sort_values(by="Score", ascending=False).head(10)
-        top_names = set(top_df["name"].tolist())
         # Load vacancy text for GPT
         vacancy_text = Path("outputs/text/job/Vacancy.txt").read_text(encoding="utf-8") if Path("outputs/text/job/Vacancy.txt").exists() else ""
-        # Sort entities by Score descending (matching top 10)
-        name_to_score = dict(zip(top_df["name"], top_df["Score"]))
-        top_entities = [cand for cand in entities if cand["name"] in top_names]
-        top_entities.sort(key=lambda c: name_to_score.get(c["name"], 0), reverse=True)
-        for cand in top_entities:
-            st.subheader(cand["name"])
-            cand_skills = set([s.lower() for s in cand.get("skills", [])])
+        # Candidates are keyed by file, so same-name candidates stay distinct
+        for cand in page_rows:
+            st.subheader(f"{cand['name']} ({cand['file']})")
+            cand_skills = set([s.lower() for s in cand.get("skills") or []])
             matched_skills = required_skills & cand_skills
             st.markdown(f"**Matched Skills:** {', '.join([s.title() for s in matched_skills]) if matched_skills else 'None'}")
             # Removed Experience Years from display
             cv_txt_path = Path(f"outputs/text/cvs/{cand['file'].replace('.pdf','.txt').replace('.docx','.txt')}")
             cv_text = cv_txt_path.read_text(encoding="utf-8") if cv_txt_path.exists() else "[CV text not found]"
             with st.expander("Deep Analysis (GPT)"):
-                key = f"gpt_{cand['name']}"
+                key = f"gpt_{cand['file']}"
                 if key not in st.session_state:
                     st.session_state[key] = None
-                if st.button(f"Run Deep Analysis for {cand['name']}", key=f"btn_{cand['name']}"):
+                if st.button(f"Run Deep Analysis for {cand['name']}", key=f"btn_{cand['file']}"):
                     if cv_text and vacancy_text:
                         with st.spinner("Running GPT deep analysis..."):
                             st.session_state[key] = gpt_deep_analysis(cv_text, vacancy_text)
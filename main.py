@@ -1,8 +1,13 @@
 import subprocess
+import sys
+from datetime import date
 from pathlib import Path
 
 # Define paths
 project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root / "src"))
+from vacancy_library import vacancy_id_for
+from stage_cache import StageCache, module_closure
 
 data_dir = project_root / "data"
 cvs_dir = data_dir / "cvs"
@@ -14,9 +19,17 @@ cvs_text_dir = text_dir / "cvs"
 job_text_dir = text_dir / "job"
 
 entities_json = outputs_dir / "entities.json"
+entities_table = outputs_dir / "entities.parquet"
 vacancy_json = outputs_dir / "vacancy.json"
+vacancy_library = outputs_dir / "vacancies"
 vectors_json = outputs_dir / "vectors.json"
+ranking_table = outputs_dir / "ranking.parquet"
 ranking_csv = outputs_dir / "ranking.csv"
+profile_dir = outputs_dir / "profile"
+components_table = outputs_dir / "components.parquet"
+search_db = outputs_dir / "search.db"
+shards_dir = outputs_dir / "shards"
+stage_cache_json = outputs_dir / ".cache" / "stages.json"
 
 # Ensure output directories exist
 cvs_text_dir.mkdir(parents=True, exist_ok=True)
@@ -29,9 +42,47 @@ def run_cmd(cmd: str):
     subprocess.run(cmd, shell=True, check=True)
 
 if __name__ == "__main__":
-    # Step 1: Extract text from CVs and vacancy
-    run_cmd(f"python src/text_extraction.py --input-dir {cvs_dir} --output-dir {cvs_text_dir}")
-    run_cmd(f"python src/text_extraction.py --input-dir {vacancy_dir} --output-dir {job_text_dir}")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the end-to-end CV matching pipeline")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="Process CVs as N shards in separate local processes (0 = single run)")
+    parser.add_argument("--vacancy-id", type=str,
+                        help="Vacancy from the library to rank against (default: first vacancy text)")
+    parser.add_argument("--weights", type=str, default="",
+                        help="Score weights, e.g. 'skills=0.6,experience=0.2,education=0.2'")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Profile every stage (cProfile, tracemalloc, stack samples) into {profile_dir}")
+    parser.add_argument("--no-cache", action="store_true", help="Run every stage even if its inputs are unchanged")
+    args = parser.parse_args()
+    # Appended to each stage command; stages write <stage>.*.pstats/.collapsed/.memory.txt/.slowest.txt
+    prof = f" --profile {profile_dir}" if args.profile else ""
+    weights = f' --weights "{args.weights}"' if args.weights else ""
+
+    # Profiling needs the stages to actually run, so it bypasses the cache
+    cache = StageCache(stage_cache_json, enabled=not (args.no_cache or args.profile))
+
+    def run_stage(name: str, cmd: str, inputs, outputs, profile: bool = True, params=None):
+        """
+        Runs a stage command unless its inputs, command line and code are unchanged since the last run.
+        profile=False for commands without a --profile option; params adds other values the output depends on.
+        """
+        script = project_root / cmd.split()[1]
+        cache.run(name, lambda: run_cmd(cmd + (prof if profile else "")), inputs=inputs, outputs=outputs,
+                  params={"cmd": cmd, **(params or {})}, code=module_closure(script))
+
+    # Experience ranges ending in "present" run to the current month, so entities are
+    # re-parsed when the month changes
+    as_of = {"as_of": date.today().strftime("%Y-%m")}
+
+    # Step 1: Extract text from the vacancy (sharded runs extract CVs inside each shard)
+    if not args.shards:
+        run_stage("text_extraction-cvs",
+                  f"python src/text_extraction.py --input-dir {cvs_dir} --output-dir {cvs_text_dir}",
+                  inputs=[cvs_dir], outputs=[cvs_text_dir])
+    run_stage("text_extraction-job",
+              f"python src/text_extraction.py --input-dir {vacancy_dir} --output-dir {job_text_dir}",
+              inputs=[vacancy_dir], outputs=[job_text_dir])
 
     # Identify vacancy TXT file
     vac_txt_files = list(job_text_dir.glob("*.txt"))
@@ -39,29 +90,59 @@ if __name__ == "__main__":
         raise FileNotFoundError(f"No text files found in {job_text_dir}")
     vac_txt = vac_txt_files[0]
 
-    # Step 2: Parse vacancy requirements first
-    run_cmd(f"python src/gpt_vacancy_parser.py --input {vac_txt} --output {vacancy_json}")
+    # Step 2: Parse new or edited vacancies into the library, then select one as vacancy.json
+    run_stage("vacancy_library",
+              f"python src/vacancy_library.py sync --text-dir {job_text_dir} --library {vacancy_library} --parser gpt",
+              inputs=[job_text_dir], outputs=[vacancy_library])
+    # run_stage("vacancy_library", f"python src/vacancy_library.py sync --text-dir {job_text_dir} --library {vacancy_library} --parser rules", inputs=[job_text_dir], outputs=[vacancy_library])
+    vacancy_id = args.vacancy_id or vacancy_id_for(vac_txt)
+    run_stage("vacancy_export",
+              f'python src/vacancy_library.py export --library {vacancy_library} --id "{vacancy_id}" --output {vacancy_json}',
+              inputs=[vacancy_library], outputs=[vacancy_json], profile=False)
 
-    # run_cmd(f"python src/vacancy_parsing.py --vacancy-file {vac_txt} --output-json {vacancy_json}")
+    if args.shards:
+        # Steps 3-5, sharded: plan by file hash, process each shard, merge into one ranking
+        run_stage("sharded",
+                  f"python src/sharding.py run-local --input-dir {cvs_dir} --shards {args.shards} --vacancy-json {vacancy_json} --work-dir {shards_dir} --output {ranking_table} --output {ranking_csv} --components {components_table} --entities {entities_json} --entities {entities_table} --text-dir {cvs_text_dir}{weights}",
+                  inputs=[cvs_dir, vacancy_json],
+                  outputs=[ranking_table, ranking_csv, components_table, entities_json, entities_table, cvs_text_dir],
+                  params=as_of)
+    else:
+        # Step 3: Extract entities from CV texts (now pass correct skills file)
+        run_stage("entity_extraction",
+                  f"python src/entity_extraction.py --input-dir {cvs_text_dir} --output-json {entities_json} --skills-file {vacancy_json} --output-table {entities_table}",
+                  inputs=[cvs_text_dir, vacancy_json], outputs=[entities_json, entities_table], params=as_of)
 
-    # Step 3: Extract entities from CV texts (now pass correct skills file)
-    run_cmd(f"python src/entity_extraction.py --input-dir {cvs_text_dir} --output-json {entities_json} --skills-file {vacancy_json}")
+        # Step 4: Vectorize candidates and vacancy
+        run_stage("vectorize",
+                  f"python src/vectorize.py --entities-json {entities_json} --vacancy-json {vacancy_json} --output-json {vectors_json}",
+                  inputs=[entities_json, vacancy_json], outputs=[vectors_json])
 
-    # Step 4: Vectorize candidates and vacancy
-    run_cmd(f"python src/vectorize.py --entities-json {entities_json} --vacancy-json {vacancy_json} --output-json {vectors_json}")
+        # Step 5: Compute scores and ranking
+        run_stage("scoring",
+                  f"python src/scoring.py --vector-json {vectors_json} --output {ranking_table} --output-csv {ranking_csv} --components {components_table}{weights}",
+                  inputs=[vectors_json], outputs=[ranking_table, ranking_csv, components_table])
 
-    # Step 5: Compute scores and ranking
-    run_cmd(f"python src/scoring.py --vector-json {vectors_json} --output-csv {ranking_csv}")
+    # Step 6: Full-text search index over the CV texts (sharded runs mirror their texts there too)
+    run_stage("search_index",
+              f"python src/search_index.py sync --text-dir {cvs_text_dir} --index {search_db}",
+              inputs=[cvs_text_dir], outputs=[search_db])
 
-    # Step 6: Plots Results
-    run_cmd(f"python src/plot_results.py --ranking-csv {ranking_csv} --output-dir {outputs_dir / 'plots'}")
+    # Step 7: Plots Results
+    run_stage("plot_results",
+              f"python src/plot_results.py --ranking-csv {ranking_table} --output-dir {outputs_dir / 'plots'}",
+              inputs=[ranking_table], outputs=[outputs_dir / "plots"])
 
     # Step Optional: GPT Parser
     
     print("Pipeline complete. Results:")
     print(f"- CV texts: {cvs_text_dir}")
     print(f"- Vacancy text: {vac_txt}")
-    print(f"- Parsed entities: {entities_json}")
+    print(f"- Parsed entities: {entities_json} ({entities_table})")
     print(f"- Vacancy requirements: {vacancy_json}")
     print(f"- Vectors: {vectors_json}")
-    print(f"- Ranking CSV: {ranking_csv}")
+    print(f"- Ranking: {ranking_table} (CSV export: {ranking_csv})")
+    print(f"- Component scores: {components_table}")
+    print(f"- Search index: {search_db}")
+    cache.save()
+    cache.report()
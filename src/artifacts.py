@@ -0,0 +1,214 @@
+import csv
+import json
+import os
+import textwrap
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# Stable schemas for the pipeline's tabular artifacts.
+# Column names match the existing CSV/JSON outputs so every reader keeps working.
+RANKING_SCHEMA = pa.schema([
+    ("file", pa.string()),
+    ("name", pa.string()),
+    ("Score", pa.float64()),
+    ("Skill Matches", pa.int32()),
+    ("Years of Experiences", pa.float64()),
+    ("Education Field", pa.string()),
+])
+
+# Unweighted per-candidate component scores, used to re-rank under new weights
+COMPONENT_SCHEMA = pa.schema([
+    ("file", pa.string()),
+    ("name", pa.string()),
+    ("Score", pa.float64()),
+    ("skills_score", pa.float64()),
+    ("experience_score", pa.float64()),
+    ("education_level_score", pa.float64()),
+    ("education_field_score", pa.float64()),
+    ("Skill Matches", pa.int32()),
+    ("Years of Experiences", pa.float64()),
+    ("Education Field", pa.string()),
+])
+
+ENTITY_SCHEMA = pa.schema([
+    ("file", pa.string()),
+    ("name", pa.string()),
+    ("education_level", pa.float64()),
+    ("education_field", pa.string()),
+    ("total_experience_years", pa.float64()),
+    ("skills", pa.list_(pa.string())),
+])
+
+PARQUET_SUFFIXES = {".parquet"}
+ARROW_SUFFIXES = {".arrow", ".feather", ".ipc"}
+CSV_SUFFIXES = {".csv"}
+JSON_SUFFIXES = {".json"}
+
+
+def artifact_format(path: Path) -> str:
+    """
+    Returns the storage format ('parquet', 'arrow', 'csv' or 'json') implied by a file suffix.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix in PARQUET_SUFFIXES:
+        return "parquet"
+    if suffix in ARROW_SUFFIXES:
+        return "arrow"
+    if suffix in CSV_SUFFIXES:
+        return "csv"
+    if suffix in JSON_SUFFIXES:
+        return "json"
+    raise ValueError(f"Unsupported artifact format: {path}")
+
+
+def rows_to_table(rows, schema: pa.Schema) -> pa.Table:
+    """
+    Builds an Arrow table from a list of dicts, keeping only (and all of) the schema columns.
+    """
+    return pa.Table.from_pylist(list(rows), schema=schema)
+
+
+def write_table(table: pa.Table, path: Path):
+    """
+    Writes an Arrow table to Parquet, Arrow IPC, CSV or JSON depending on the file suffix.
+    Arrow IPC files are left uncompressed so readers can memory-map them without copying.
+    The file is written to a temporary sibling and renamed, so readers never see a partial file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fmt = artifact_format(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    if fmt == "parquet":
+        pq.write_table(table, tmp_path, compression="zstd")
+    elif fmt == "arrow":
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+    elif fmt == "csv":
+        # Plain csv module keeps the export identical to the historical ranking.csv
+        with open(tmp_path, "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=table.column_names)
+            writer.writeheader()
+            for row in table.to_pylist():
+                writer.writerow(row)
+    else:
+        tmp_path.write_text(json.dumps(table.to_pylist(), indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def write_rows(rows, path: Path, schema: pa.Schema):
+    """
+    Convenience wrapper: list of dicts -> artifact file with the given schema.
+    """
+    write_table(rows_to_table(rows, schema), path)
+
+
+class RowWriter:
+    """
+    Streams batches of dict rows into an artifact file without holding the whole table in memory.
+    Same formats and atomic rename as write_table; use as a context manager.
+    """
+
+    def __init__(self, path: Path, schema: pa.Schema):
+        self.path = Path(path)
+        self.schema = schema
+        self.format = artifact_format(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self.rows_written = 0
+        if self.format == "parquet":
+            self._writer = pq.ParquetWriter(self.tmp_path, schema, compression="zstd")
+        elif self.format == "arrow":
+            self._writer = pa.ipc.new_file(str(self.tmp_path), schema)
+        else:
+            self._file = open(self.tmp_path, "w", newline="", encoding="utf-8")
+            if self.format == "csv":
+                self._writer = csv.DictWriter(self._file, fieldnames=schema.names, extrasaction="ignore")
+                self._writer.writeheader()
+            else:
+                self._file.write("[")
+
+    def write(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        if self.format in ("parquet", "arrow"):
+            self._writer.write_table(rows_to_table(rows, self.schema))
+        elif self.format == "csv":
+            self._writer.writerows(rows)
+        else:
+            # Same layout as json.dumps(list, indent=2)
+            for row in rows:
+                item = json.dumps({name: row.get(name) for name in self.schema.names}, indent=2, ensure_ascii=False)
+                self._file.write(("," if self.rows_written else "") + "\n" + textwrap.indent(item, "  "))
+                self.rows_written += 1
+            return
+        self.rows_written += len(rows)
+
+    def close(self):
+        if self.format in ("parquet", "arrow"):
+            self._writer.close()
+        else:
+            if self.format == "json":
+                self._file.write("\n]" if self.rows_written else "]")
+            self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self.format in ("parquet", "arrow"):
+            self._writer.close()
+        else:
+            self._file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def read_table(path: Path, columns=None) -> pa.Table:
+    """
+    Reads an artifact into an Arrow table, loading only the requested columns.
+    Parquet and Arrow IPC files are memory-mapped.
+    """
+    path = Path(path)
+    fmt = artifact_format(path)
+    if fmt == "parquet":
+        return pq.read_table(path, columns=columns, memory_map=True)
+    if fmt == "arrow":
+        return feather.read_table(path, columns=columns, memory_map=True)
+    if fmt == "csv":
+        convert_options = pacsv.ConvertOptions(include_columns=columns) if columns else None
+        return pacsv.read_csv(path, convert_options=convert_options)
+    table = pa.Table.from_pylist(json.loads(path.read_text(encoding="utf-8")))
+    return table.select(columns) if columns else table
+
+
+def read_rows(path: Path, columns=None) -> list:
+    """
+    Reads an artifact as a list of dicts.
+    """
+    path = Path(path)
+    if artifact_format(path) == "json" and not columns:
+        return json.loads(path.read_text(encoding="utf-8"))
+    return read_table(path, columns).to_pylist()
+
+
+def find_artifact(stem_path: Path, preferred=(".parquet", ".arrow", ".feather", ".csv", ".json")):
+    """
+    Given a path without (or with any) suffix, returns the first existing sibling in order of
+    preference, e.g. outputs/ranking -> outputs/ranking.parquet before outputs/ranking.csv.
+    Returns None if nothing exists.
+    """
+    stem_path = Path(stem_path)
+    for suffix in preferred:
+        candidate = stem_path.with_suffix(suffix)
+        if candidate.exists():
+            return candidate
+    return None
@@ -1,9 +1,13 @@
+import os
 import re
 import json
 from pathlib import Path
 import spacy
 from spacy.matcher import PhraseMatcher
 from concurrent.futures import ProcessPoolExecutor
+from artifacts import ENTITY_SCHEMA, RowWriter
+from experience import experience_timeline
+from profiling import document_timer, init_worker_profiling, profile_stage
 
 # Load spaCy model (ensure you have downloaded 'en_core_web_sm')
 nlp = spacy.load("en_core_web_sm")
@@ -20,6 +24,15 @@ EDU_LEVELS = {
 # Vacancy skills placeholder
 VACANCY_SKILLS = []
 
+# Field order of the fixed-layout rows batch_parse workers send back to the parent
+ENTITY_FIELDS = ("file", "name", "education_level", "education_field", "total_experience_years", "skills")
+
+# PhraseMatchers keyed by skill tuple, so each process builds a matcher once per vacancy
+_MATCHERS = {}
+
+# Skill list shipped once per batch_parse worker by _init_parse_worker
+_WORKER_SKILLS = None
+
 
 def clean_and_limit_name(name_str: str) -> str:
     """
@@ -92,46 +105,20 @@ def extract_education(text: str) -> dict:
 def extract_experience(text: str) -> float:
     """
     Extracts total years of professional experience from date ranges in text.
-    Subtracts years found in the education section to avoid mixing academic experience.
+    Overlapping or repeated ranges count once, and ranges in the education section are ignored.
     """
-    def sum_years_from_text(txt):
-        years = 0.0
-        # Regex for simple year-year ranges
-        ranges = re.findall(r"(\d{4})\s*[–-]\s*(\d{4})", txt)
-        for start, end in ranges:
-            s, e = int(start), int(end)
-            if e >= s:
-                years += e - s
-        # Regex for month year to month year (approximate years)
-        ranges2 = re.findall(r"([A-Za-z]{3,9})\s*(\d{4})\s*(?:to|until|-|–)\s*([A-Za-z]{3,9})\s*(\d{4})", txt)
-        month_map = {m.lower(): i for i, m in enumerate([
-            "January","February","March","April","May","June",
-            "July","August","September","October","November","December"
-        ], start=1)}
-        for m1, y1, m2, y2 in ranges2:
-            try:
-                start_year = int(y1)
-                start_month_val = month_map.get(m1.lower(), 1)
-                start_val = start_year + (start_month_val - 1) / 12
-                end_year = int(y2)
-                end_month_val = month_map.get(m2.lower(), 12)
-                end_val = end_year + (end_month_val -1 ) / 12
-                if end_val >= start_val:
-                    years += (end_val - start_val)
-            except (ValueError, TypeError):
-                continue
-        return years
+    return experience_timeline(text)[0]
+
 
-    # 1. Extract all years from the full text
-    total_years = sum_years_from_text(text)
-    # 2. Try to find education section and subtract its years
-    edu_section = ""
-    edu_match = re.search(r"EDUCATION(.+?)(EXPERIENCE|SKILLS|$)", text, re.I | re.S)
-    if edu_match:
-        edu_section = edu_match.group(1)
-    edu_years = sum_years_from_text(edu_section)
-    prof_years = max(0.0, total_years - edu_years)
-    return round(prof_years, 1)
+def get_skill_matcher(skills_list) -> PhraseMatcher:
+    key = tuple(skills_list)
+    matcher = _MATCHERS.get(key)
+    if matcher is None:
+        matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+        patterns = [nlp.make_doc(skill.lower()) for skill in skills_list]
+        matcher.add("SKILL", patterns)
+        _MATCHERS[key] = matcher
+    return matcher
 
 
 def extract_skills(text: str, skills_list=None) -> list:
@@ -139,9 +126,7 @@ def extract_skills(text: str, skills_list=None) -> list:
         return []
 
     doc = nlp(text.lower())
-    matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
-    patterns = [nlp.make_doc(skill.lower()) for skill in skills_list]
-    matcher.add("SKILL", patterns)
+    matcher = get_skill_matcher(skills_list)
 
     matches = matcher(doc)
     found = set()
@@ -156,7 +141,14 @@ def parse_document(txt_path: Path, skills_list=None) -> dict:
     Parses a text file for education, experience, and skills.
     Returns a dict with extracted fields, using multiple strategies for name detection.
     """
-    text = txt_path.read_text(encoding="utf-8")
+    return parse_text(txt_path.read_text(encoding="utf-8"), txt_path.name, skills_list)
+
+
+def parse_text(text: str, file_name: str, skills_list=None) -> dict:
+    """
+    parse_document for text already in memory; file_name is the record's 'file' key
+    (e.g. 'CV Sample 1.txt') and the last-resort source of the candidate's name.
+    """
     edu_info = extract_education(text)
     exp = extract_experience(text)
     skills = extract_skills(text, skills_list)
@@ -196,7 +188,7 @@ def parse_document(txt_path: Path, skills_list=None) -> dict:
 
     # 3) Fallback to filename stem
     if not name:
-        stem = txt_path.stem
+        stem = Path(file_name).stem
         
         # Attempt 3a: Clean stem aggressively (remove keywords, digits, then clean_and_limit)
         stem_normalized_spaces = re.sub(r"[\s_-]+", " ", stem).strip() # Normalize separators to spaces
@@ -222,7 +214,7 @@ def parse_document(txt_path: Path, skills_list=None) -> dict:
         name = "Unknown"
 
     return {
-        "file": txt_path.name,
+        "file": file_name,
         "name": name,
         "education_level": edu_info["level"],
         "education_field": edu_info["field"],
@@ -232,22 +224,97 @@ def parse_document(txt_path: Path, skills_list=None) -> dict:
 
 
 
-def parse_document_helper(args):
-    return parse_document(*args)
+def load_skills(skills_file: Path) -> list:
+    """
+    Loads the unique required + nice-to-have skills from a vacancy JSON file,
+    preserving their order in the file. Returns [] if the file can't be read.
+    """
+    try:
+        skills_data = json.loads(skills_file.read_text(encoding='utf-8'))
+        # Extend with unique skills only, preserving order from file
+        loaded_skills = []
+        for skill in skills_data.get('required_skills', []):
+            if skill not in loaded_skills:
+                loaded_skills.append(skill)
+        for skill in skills_data.get('nice_to_have_skills', []):
+            if skill not in loaded_skills:
+                loaded_skills.append(skill)
+        return loaded_skills
+    except json.JSONDecodeError:
+        print(f"Warning: could not load skills from {skills_file}. Invalid JSON.")
+    except Exception as e:
+        print(f"Warning: error processing skills file {skills_file}: {e}")
+    return []
+
+
+def _init_parse_worker(skills_list):
+    """
+    ProcessPoolExecutor initializer: receives the skill list once per worker and builds the matcher.
+    """
+    global _WORKER_SKILLS
+    _WORKER_SKILLS = list(skills_list or [])
+    if _WORKER_SKILLS:
+        get_skill_matcher(_WORKER_SKILLS)
+    init_worker_profiling()
+
+
+def parse_document_row(txt_path: str) -> tuple:
+    """
+    Worker task: parses one document and returns a compact row in ENTITY_FIELDS order.
+    Only the path string goes to the worker and only this tuple comes back.
+    """
+    path = Path(txt_path)
+    with document_timer(path.name):
+        result = parse_document(path, _WORKER_SKILLS)
+    result["skills"] = tuple(result["skills"])
+    return tuple(result[field] for field in ENTITY_FIELDS)
+
+
+def parse_chunksize(num_files: int, num_workers: int) -> int:
+    """
+    Tasks per IPC round trip: ~4 chunks per worker for load balancing, capped so results keep streaming.
+    """
+    return max(1, min(64, num_files // (num_workers * 4)))
+
 
-def batch_parse(input_dir: Path, output_json: Path, skills_list=None):
+def batch_parse(input_dir: Path, output_json: Path, skills_list=None, output_table: Path = None,
+                workers: int = None):
     """
     Parses all .txt files in input_dir and writes a JSON list to output_json.
-    Uses multiprocessing for scalability.
+    Optionally also writes the entities as a columnar artifact (.parquet/.arrow) to output_table.
+    Uses multiprocessing for scalability: the skill list is sent once per worker, tasks are
+    chunked by corpus size, and rows are streamed into the writers as they arrive.
     """
-    txt_files = list(input_dir.glob("*.txt"))
-    args_list = [(f, skills_list) for f in txt_files]
-    results = []
-    from concurrent.futures import ProcessPoolExecutor
-    with ProcessPoolExecutor() as executor:
-        results = list(executor.map(parse_document_helper, args_list))
-    output_json.write_text(json.dumps(results, indent=2, ensure_ascii=False)) # ensure_ascii=False for Unicode names
-    print(f"Parsed {len(results)} documents -> {output_json}")
+    txt_files = [str(f) for f in input_dir.glob("*.txt")]
+    workers = workers or os.cpu_count() or 1
+    chunksize = parse_chunksize(len(txt_files), workers)
+    writers = [RowWriter(output_json, ENTITY_SCHEMA)]  # ensure_ascii=False for Unicode names
+    if output_table:
+        writers.append(RowWriter(output_table, ENTITY_SCHEMA))
+    count = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_parse_worker,
+                                 initargs=(skills_list,)) as executor:
+            batch = []
+            for row in executor.map(parse_document_row, txt_files, chunksize=chunksize):
+                batch.append(dict(zip(ENTITY_FIELDS, row)))
+                if len(batch) >= 256:
+                    for writer in writers:
+                        writer.write(batch)
+                    count += len(batch)
+                    batch = []
+            for writer in writers:
+                writer.write(batch)
+            count += len(batch)
+    except BaseException:
+        for writer in writers:
+            writer.abort()
+        raise
+    for writer in writers:
+        writer.close()
+    print(f"Parsed {count} documents -> {output_json}")
+    if output_table:
+        print(f"Entities table -> {output_table}")
 
 
 if __name__ == "__main__":
@@ -257,29 +324,21 @@ if __name__ == "__main__":
     parser.add_argument("--input-dir", type=Path, required=True, help="Folder with .txt docs")
     parser.add_argument("--output-json", type=Path, required=True, help="Output JSON file path")
     parser.add_argument("--skills-file", type=Path, help="Optional: JSON file with vacancy skills list")
+    parser.add_argument("--output-table", type=Path, help="Optional: also write entities as .parquet/.arrow")
+    parser.add_argument("--vacancy-library", type=Path, help="Optional: vacancy library folder (with --vacancy-id)")
+    parser.add_argument("--vacancy-id", type=str, help="Optional: take the skills from this library vacancy")
+    parser.add_argument("--profile", type=Path, help="Optional: write cProfile/tracemalloc/stack samples here")
     args = parser.parse_args()
 
     # Ensure parent directory for output_json exists
     args.output_json.parent.mkdir(parents=True, exist_ok=True)
 
-    if args.skills_file and args.skills_file.exists():
+    from vacancy_library import resolve_vacancy_json
+    skills_file = resolve_vacancy_json(args.skills_file, args.vacancy_library, args.vacancy_id)
+
+    if skills_file and skills_file.exists():
         VACANCY_SKILLS.clear()
-        try:
-            skills_data = json.loads(args.skills_file.read_text(encoding='utf-8'))
-            # Extend with unique skills only, preserving order from file if possible, then sort
-            loaded_skills = []
-            for skill in skills_data.get('required_skills', []):
-                if skill not in loaded_skills:
-                    loaded_skills.append(skill)
-            for skill in skills_data.get('nice_to_have_skills', []):
-                 if skill not in loaded_skills:
-                    loaded_skills.append(skill)
-            VACANCY_SKILLS.extend(loaded_skills)
-
-        except json.JSONDecodeError:
-            print(f"Warning: could not load skills from {args.skills_file}. Invalid JSON.")
-        except Exception as e:
-            print(f"Warning: error processing skills file {args.skills_file}: {e}")
-
-
-    batch_parse(args.input_dir, args.output_json, VACANCY_SKILLS)
\ No newline at end of file
+        VACANCY_SKILLS.extend(load_skills(skills_file))
+
+    with profile_stage("entity_extraction", args.profile):
+        batch_parse(args.input_dir, args.output_json, VACANCY_SKILLS, args.output_table)
\ No newline at end of file
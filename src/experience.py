@@ -0,0 +1,212 @@
+import re
+from datetime import date
+
+# English and Indonesian month names/abbreviations -> month number
+MONTHS = {
+    "january": 1, "jan": 1, "januari": 1,
+    "february": 2, "feb": 2, "februari": 2, "pebruari": 2,
+    "march": 3, "mar": 3, "maret": 3,
+    "april": 4, "apr": 4,
+    "may": 5, "mei": 5,
+    "june": 6, "jun": 6, "juni": 6,
+    "july": 7, "jul": 7, "juli": 7,
+    "august": 8, "aug": 8, "agustus": 8, "agu": 8, "agt": 8, "ags": 8,
+    "september": 9, "sep": 9, "sept": 9,
+    "october": 10, "oct": 10, "oktober": 10, "okt": 10,
+    "november": 11, "nov": 11, "nopember": 11,
+    "december": 12, "dec": 12, "desember": 12, "des": 12,
+}
+
+PRESENT_WORDS = ("present", "now", "current", "currently", "today", "ongoing", "sekarang", "saat ini", "kini")
+
+# Section headers (English and Indonesian) -> section tag. TOKEN_RE tries longer phrases
+# first, so "ORGANIZATIONAL EXPERIENCE" is not read as "EXPERIENCE".
+SECTION_HEADERS = {
+    "organizational experience": "organization",
+    "organisational experience": "organization",
+    "pengalaman organisasi": "organization",
+    "riwayat pendidikan": "education",
+    "work experience": "experience",
+    "professional experience": "experience",
+    "employment history": "experience",
+    "work history": "experience",
+    "riwayat karier": "experience",
+    "riwayat karir": "experience",
+    "pengalaman kerja": "experience",
+    "organization": "organization",
+    "organisation": "organization",
+    "organisasi": "organization",
+    "volunteer": "organization",
+    "experience": "experience",
+    "experiences": "experience",
+    "employment": "experience",
+    "pengalaman": "experience",
+    "education": "education",
+    "pendidikan": "education",
+    "skills": "other",
+    "keahlian": "other",
+    "achievements": "other",
+    "awards": "other",
+    "certifications": "other",
+    "sertifikasi": "other",
+    "languages": "other",
+    "bahasa": "other",
+    "references": "other",
+    "training": "other",
+    "pelatihan": "other",
+}
+
+# Ranges in these sections count as work; None is text before the first recognised header
+COUNTED_SECTIONS = {"experience", None}
+
+
+def _alternation(words) -> str:
+    return "|".join(re.escape(w).replace(r"\ ", r"\s+") for w in sorted(words, key=len, reverse=True))
+
+
+def _spaced(phrase: str) -> str:
+    # Matches both "EDUCATION" and letter-spaced "E D U C A T I O N"
+    return r"\s*".join(r"\s?".join(re.escape(c) for c in word) for word in phrase.split())
+
+
+_YEAR = r"(?:19|20)\d{2}"
+
+# One compiled pass over the text finds every section header and date token
+TOKEN_RE = re.compile(
+    rf"(?P<section>\b(?:{'|'.join(_spaced(h) for h in sorted(SECTION_HEADERS, key=len, reverse=True))})\b)"
+    rf"|\b(?P<month>{_alternation(MONTHS)})\.?\s*,?\s*(?P<month_year>{_YEAR})\b"
+    rf"|\b(?P<num_month>0?[1-9]|1[0-2])\s*[/.]\s*(?P<num_year>{_YEAR})\b"
+    rf"|\b(?P<year>{_YEAR})\b"
+    rf"|\b(?P<present>{_alternation(PRESENT_WORDS)})\b",
+    re.I
+)
+
+# What may stand between the two ends of a range
+SEPARATOR_RE = re.compile(r"\s*(?:-|–|—|to|until|till|s/d|s\.d\.|sampai|hingga)\s*", re.I)
+
+_HEADER_LOOKUP = {re.sub(r"\s+", "", h): tag for h, tag in SECTION_HEADERS.items()}
+
+
+def _month_index(year: int, month: int) -> int:
+    return year * 12 + month - 1
+
+
+def _format_month(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def tokenize(text: str, today: date):
+    """
+    Yields (kind, value, start, end) for every section header and date in text, in order.
+    kind is "section" (value = tag), "date" (value = (month index, has_month)) or "present".
+    Headers only count when capitalised, so "hands-on experience" in prose doesn't open a section.
+    """
+    for m in TOKEN_RE.finditer(text):
+        if m.group("section"):
+            if m.group("section")[0].isupper():
+                yield "section", _HEADER_LOOKUP[re.sub(r"\s+", "", m.group("section").lower())], m.start(), m.end()
+        elif m.group("month"):
+            month = MONTHS[re.sub(r"\s+", " ", m.group("month").lower())]
+            yield "date", (_month_index(int(m.group("month_year")), month), True), m.start(), m.end()
+        elif m.group("num_month"):
+            yield "date", (_month_index(int(m.group("num_year")), int(m.group("num_month"))), True), m.start(), m.end()
+        elif m.group("year"):
+            yield "date", (_month_index(int(m.group("year")), 1), False), m.start(), m.end()
+        else:
+            yield "present", (_month_index(today.year, today.month), True), m.start(), m.end()
+
+
+def extract_intervals(text: str, today: date = None) -> list:
+    """
+    Finds date ranges ("Feb 2018 - Sep 2023", "2021 - Present", "Jan 2023 - Saat ini", "03/2020 to 05/2021")
+    and returns them as dicts tagged with the section they appear in. Intervals are half-open month
+    indexes: a range ending in a named month includes that month, a bare end year ("2018 - 2019")
+    counts up to January of that year ("2019 - 2019" is the whole year), and ends after today are
+    clamped to the current month.
+    """
+    today = today or date.today()
+    now = _month_index(today.year, today.month) + 1
+    intervals = []
+    section = None
+    label_start = 0
+    previous = None
+    for kind, value, start, end in tokenize(text, today):
+        if kind == "section":
+            section = value
+            label_start = end
+            previous = None
+            continue
+        if previous is not None and previous[0] == "date" and SEPARATOR_RE.fullmatch(text, previous[3], start):
+            (range_start, start_has_month), (range_end, end_has_month) = previous[1], value
+            if kind == "present" or end_has_month:
+                range_end += 1
+            elif not start_has_month and range_end == range_start:
+                range_end += 12  # "2019 - 2019": a role within a single year counts as that year
+            range_end = min(range_end, now)
+            if range_start < range_end:
+                label = re.split(r"[.•|()\n]", text[label_start:previous[2]].rstrip(" ,(-"))[-1].strip(" -,")
+                if len(label) > 60:
+                    label = label[-60:].split(" ", 1)[-1]
+                intervals.append({
+                    "start": range_start,
+                    "end": range_end,
+                    "section": section,
+                    "ongoing": kind == "present",
+                    "label": label
+                })
+            label_start = end
+            previous = None
+            continue
+        previous = (kind, value, start, end)
+    return intervals
+
+
+def union_months(intervals) -> int:
+    """
+    Total months covered by half-open [start, end) intervals, counting overlaps once (sort and sweep).
+    """
+    total = 0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def experience_timeline(text: str, today: date = None):
+    """
+    Returns (total_years, timeline). total_years is the union of the work ranges, so overlapping
+    or repeated ranges count once; education, organisation and other sections are left out.
+    timeline lists every work range as {"label", "start", "end", "months", "ongoing"} in text order.
+    """
+    work = [i for i in extract_intervals(text, today) if i["section"] in COUNTED_SECTIONS]
+    total_months = union_months((i["start"], i["end"]) for i in work)
+    timeline = [{
+        "label": i["label"],
+        "start": _format_month(i["start"]),
+        "end": "present" if i["ongoing"] else _format_month(i["end"] - 1),
+        "months": i["end"] - i["start"],
+        "ongoing": i["ongoing"]
+    } for i in work]
+    return round(total_months / 12, 1), timeline
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Show the work timeline and total experience found in a CV text")
+    parser.add_argument("txt", type=Path, nargs="+", help="CV .txt file(s)")
+    args = parser.parse_args()
+
+    for txt_path in args.txt:
+        total, timeline = experience_timeline(txt_path.read_text(encoding="utf-8"))
+        print(json.dumps({"file": txt_path.name, "total_experience_years": total, "timeline": timeline},
+                         indent=2, ensure_ascii=False))
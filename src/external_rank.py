@@ -0,0 +1,199 @@
+import csv
+import heapq
+import json
+import shutil
+import tempfile
+from itertools import islice
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.parquet as pq
+from artifacts import RANKING_SCHEMA, RowWriter, artifact_format
+from vectorize import build_skill_set, vectorize_candidate, vectorize_vacancy
+from scoring import score_candidate
+
+
+def iter_candidate_chunks(input_path: Path, chunk_size: int):
+    """
+    Yields lists of at most chunk_size candidate dicts (entities or vectors) from a
+    .parquet/.arrow table or a .jsonl file, without loading the whole input.
+    """
+    input_path = Path(input_path)
+    if input_path.suffix.lower() == ".jsonl":
+        with open(input_path, encoding="utf-8") as f:
+            lines = (json.loads(line) for line in f if line.strip())
+            while True:
+                chunk = list(islice(lines, chunk_size))
+                if not chunk:
+                    return
+                yield chunk
+    fmt = artifact_format(input_path)
+    if fmt == "parquet":
+        for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+    elif fmt == "arrow":
+        with pa.memory_map(str(input_path)) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                for offset in range(0, batch.num_rows, chunk_size):
+                    yield batch.slice(offset, chunk_size).to_pylist()
+    else:
+        raise ValueError(f"Out-of-core ranking needs a .parquet, .arrow or .jsonl input, got {input_path}")
+
+
+def score_chunks(input_path: Path, vacancy_reqs: dict, chunk_size: int, weights=None):
+    """
+    Yields lists of (seq, ranking_row) per chunk. seq is the row's position in the input and
+    breaks score ties the same way the stable in-memory sort does.
+    """
+    skill_set = build_skill_set([], vacancy_reqs)
+    vac_vec = vectorize_vacancy(vacancy_reqs, skill_set)
+    seq = 0
+    for chunk in iter_candidate_chunks(input_path, chunk_size):
+        scored = []
+        for cand in chunk:
+            vec = cand if "skill_vector" in cand else vectorize_candidate(cand, skill_set)
+            row, _ = score_candidate(vec, vac_vec, weights)
+            scored.append((seq, row))
+            seq += 1
+        yield scored
+
+
+def sort_key(item):
+    seq, row = item
+    return (-row["Score"], seq)
+
+
+def write_run(items, path: Path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for seq, row in items:
+            writer.writerow([seq] + [row[name] for name in RANKING_SCHEMA.names])
+
+
+def read_run(path: Path):
+    """
+    Streams (seq, row) back from a spilled run, restoring the column types.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for values in csv.reader(f):
+            seq, file_name, name, score, matches, years, field = values
+            yield int(seq), {
+                "file": file_name,
+                "name": name,
+                "Score": float(score),
+                "Skill Matches": int(matches),
+                "Years of Experiences": float(years),
+                "Education Field": field
+            }
+
+
+def merge_runs(run_paths, tmp_dir: Path, max_open_runs: int):
+    """
+    K-way merges sorted runs. If there are more runs than max_open_runs, intermediate
+    passes merge groups of runs into larger runs first, so open files stay bounded.
+    Returns an iterator over the fully ordered (seq, row) stream.
+    """
+    run_paths = list(run_paths)
+    pass_no = 0
+    while len(run_paths) > max_open_runs:
+        merged_paths = []
+        for i in range(0, len(run_paths), max_open_runs):
+            group = run_paths[i:i + max_open_runs]
+            out_path = tmp_dir / f"pass{pass_no}-run{len(merged_paths):06d}.csv"
+            write_run(heapq.merge(*(read_run(p) for p in group), key=sort_key), out_path)
+            for p in group:
+                p.unlink()
+            merged_paths.append(out_path)
+        run_paths = merged_paths
+        pass_no += 1
+    return heapq.merge(*(read_run(p) for p in run_paths), key=sort_key)
+
+
+def rank_out_of_core(input_path: Path, vacancy_json: Path, output_paths=(), top_k: int = 0,
+                     top_k_path: Path = None, chunk_size: int = 100_000, max_open_runs: int = 64,
+                     tmp_dir: Path = None, weights=None):
+    """
+    Ranks a candidate pool that doesn't fit in memory.
+    Candidates are scored chunk by chunk; a bounded heap keeps the top_k rows, and for the full
+    ordering every chunk is sorted and spilled as a run, then the runs are merged externally and
+    streamed into each output. Peak memory is about one chunk plus top_k rows.
+    """
+    vacancy_reqs = json.loads(Path(vacancy_json).read_text(encoding="utf-8"))
+    output_paths = list(output_paths)
+    work_dir = Path(tempfile.mkdtemp(prefix="ranking-runs-", dir=tmp_dir))
+    top = []  # min-heap of ((score, -seq), row): the weakest kept row is evicted first
+    run_paths = []
+    total = chunks = 0
+    try:
+        for scored in score_chunks(input_path, vacancy_reqs, chunk_size, weights):
+            total += len(scored)
+            chunks += 1
+            if top_k:
+                for seq, row in scored:
+                    entry = ((row["Score"], -seq), row)
+                    if len(top) < top_k:
+                        heapq.heappush(top, entry)
+                    elif entry[0] > top[0][0]:
+                        heapq.heapreplace(top, entry)
+            if output_paths:
+                scored.sort(key=sort_key)
+                run_path = work_dir / f"run{len(run_paths):06d}.csv"
+                write_run(scored, run_path)
+                run_paths.append(run_path)
+        print(f"Scored {total} candidates in {chunks} chunks")
+
+        if top_k:
+            best = [row for _, row in sorted(top, key=lambda e: e[0], reverse=True)]
+            with RowWriter(top_k_path, RANKING_SCHEMA) as writer:
+                writer.write(best)
+            print(f"Top {len(best)} -> {top_k_path}")
+
+        if output_paths:
+            writers = [RowWriter(p, RANKING_SCHEMA) for p in output_paths]
+            try:
+                merged = (row for _, row in merge_runs(run_paths, work_dir, max_open_runs))
+                while True:
+                    batch = list(islice(merged, chunk_size))
+                    if not batch:
+                        break
+                    for writer in writers:
+                        writer.write(batch)
+            except BaseException:
+                for writer in writers:
+                    writer.abort()
+                raise
+            for writer in writers:
+                writer.close()
+                print(f"✅ Ranking complete -> {writer.path}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    from scoring import parse_weights
+
+    parser = argparse.ArgumentParser(description="Rank a candidate pool larger than memory")
+    parser.add_argument("--input", type=Path, required=True,
+                        help="Entities or candidate vectors as .parquet, .arrow or .jsonl")
+    parser.add_argument("--vacancy-json", type=Path, required=True, help="Parsed vacancy requirements")
+    parser.add_argument("--output", type=Path, action="append", default=[],
+                        help="Full ranking output (.parquet, .arrow or .csv); may be repeated")
+    parser.add_argument("--top-k", type=int, default=0, help="Also keep the K best candidates")
+    parser.add_argument("--top-k-output", type=Path, help="Where to write the top-K ranking")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows scored and held in memory at once")
+    parser.add_argument("--max-open-runs", type=int, default=64, help="Merge fan-in before an extra pass")
+    parser.add_argument("--tmp-dir", type=Path, help="Where sorted runs are spilled (default: system temp)")
+    parser.add_argument("--weights", type=str, default="",
+                        help="Score weights, e.g. 'skills=0.6,experience=0.2,education=0.2'")
+    args = parser.parse_args()
+    if not args.output and not args.top_k:
+        parser.error("at least one of --output or --top-k is required")
+    if args.top_k and not args.top_k_output:
+        parser.error("--top-k needs --top-k-output")
+    if args.max_open_runs < 2:
+        parser.error("--max-open-runs must be at least 2")
+
+    rank_out_of_core(args.input, args.vacancy_json, args.output, args.top_k, args.top_k_output,
+                     args.chunk_size, args.max_open_runs, args.tmp_dir, parse_weights(args.weights))
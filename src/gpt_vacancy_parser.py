@@ -7,11 +7,24 @@ import os
 # Load variables from .env
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+MODEL = "gpt-4"  # or "gpt-4.1" if supported
+# Bump when the prompt or model changes so cached vacancy parses are invalidated
+PARSER_VERSION = f"{MODEL}-1"
+
+_client = None
+
+
+def get_client() -> OpenAI:
+    # Created on first use so importing this module doesn't require an API key
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
 
 def extract_vacancy_structure(vacancy_text: str) -> dict:
-    response = client.chat.completions.create(
-        model="gpt-4",  # or "gpt-4.1" if supported
+    response = get_client().chat.completions.create(
+        model=MODEL,
         messages=[
             {
                 "role": "system",
@@ -0,0 +1,188 @@
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from artifacts import ENTITY_SCHEMA, RANKING_SCHEMA, find_artifact, read_rows, write_rows
+from text_extraction import clean_text, extract_text, extract_text_from_bytes
+from entity_extraction import load_skills, parse_text
+from vectorize import build_skill_set, vectorize_candidate, vectorize_vacancy
+from scoring import DEFAULT_WEIGHTS, component_schema, load_weights, score_candidate
+from search_index import SearchIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, refresh() still catches most overlaps
+    fcntl = None
+
+LOCK_FILE = ".ranking.lock"
+
+
+@contextmanager
+def ranking_lock(outputs_dir: Path):
+    """
+    Exclusive lock around a read-modify-write of the ranking artifacts, shared by every process
+    holding a RankingState on the same outputs folder (ingestion daemon, dashboard uploads).
+    """
+    outputs_dir = Path(outputs_dir)
+    outputs_dir.mkdir(parents=True, exist_ok=True)
+    with open(outputs_dir / LOCK_FILE, "w") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class RankingState:
+    """
+    In-memory view of the pipeline outputs (entities, vectors, component scores) keyed by
+    the candidate's text file name. Single documents can be added or removed and the
+    ranking artifacts rewritten without re-processing the rest of the pool. Candidates are
+    scored with the weights stored in the pipeline's components artifact.
+    With search_index, the full-text index is kept up to date document by document.
+    """
+
+    def __init__(self, outputs_dir: Path, vacancy_json: Path, text_dir: Path = None, search_index: Path = None):
+        self.outputs_dir = Path(outputs_dir)
+        self.text_dir = Path(text_dir) if text_dir else self.outputs_dir / "text" / "cvs"
+        self.search_index = SearchIndex(search_index) if search_index else None
+        self.vacancy_json = Path(vacancy_json)
+        self.load_vacancy()
+        self.entities = {}
+        self.vectors = {}
+        self.components = {}
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.loaded_stamp = None
+        self.load()
+
+    def load_vacancy(self):
+        vacancy_reqs = json.loads(self.vacancy_json.read_text(encoding="utf-8"))
+        self.skills_list = load_skills(self.vacancy_json)
+        self.skill_set = build_skill_set([], vacancy_reqs)
+        self.vacancy_vec = vectorize_vacancy(vacancy_reqs, self.skill_set)
+
+    def load(self):
+        """
+        Seeds the state from the last pipeline run so existing candidates stay ranked.
+        """
+        components_path = find_artifact(self.outputs_dir / "components", (".parquet", ".arrow"))
+        self.weights = load_weights(components_path) if components_path else dict(DEFAULT_WEIGHTS)
+        entities_path = find_artifact(self.outputs_dir / "entities", (".parquet", ".json"))
+        if entities_path:
+            for entity in read_rows(entities_path):
+                self.add_entity(entity)
+        self.loaded_stamp = self.stamp()
+
+    def stamp(self) -> tuple:
+        """
+        Identifies the vacancy, entities and components files on disk (path and mtime),
+        to notice rewrites by other processes.
+        """
+        paths = (self.vacancy_json,
+                 find_artifact(self.outputs_dir / "entities", (".parquet", ".json")),
+                 find_artifact(self.outputs_dir / "components", (".parquet", ".arrow")))
+        return tuple((str(path), path.stat().st_mtime_ns) if path and path.exists() else None for path in paths)
+
+    def lock(self):
+        return ranking_lock(self.outputs_dir)
+
+    def refresh(self) -> bool:
+        """
+        Reloads the vacancy, weights and pool if they were rewritten since this state last loaded or
+        saved them (by main.py, the daemon or another dashboard session), so save() can't write back
+        an old snapshot or old scores. Call it under lock() before changing the state.
+        Returns True if it reloaded.
+        """
+        if self.stamp() == self.loaded_stamp:
+            return False
+        self.load_vacancy()
+        self.entities.clear()
+        self.vectors.clear()
+        self.components.clear()
+        self.load()
+        return True
+
+    def add_entity(self, entity: dict):
+        vec = vectorize_candidate(entity, self.skill_set)
+        _, components = score_candidate(vec, self.vacancy_vec, self.weights)
+        key = entity["file"]
+        self.entities[key] = entity
+        self.vectors[key] = vec
+        self.components[key] = components
+
+    def process_file(self, source_path: Path) -> dict:
+        """
+        Extracts, parses, vectorises and scores a single CV, replacing any previous version.
+        Returns the new component row.
+        """
+        text = extract_text(source_path)
+        if text is None:
+            raise ValueError(f"Unsupported file type: {source_path}")
+        return self.add_text(text, source_path.name)
+
+    def ingest_bytes(self, data, file_name: str, retain_dir: Path = None) -> dict:
+        """
+        Like process_file, for an uploaded document held in memory (bytes or memoryview).
+        The raw file is written to retain_dir only when one is given, so a later full
+        pipeline run sees it too. Returns the new component row.
+        """
+        file_name = Path(file_name).name
+        text = extract_text_from_bytes(data, file_name)
+        if text is None:
+            raise ValueError(f"Unsupported file type: {file_name}")
+        if retain_dir:
+            Path(retain_dir).mkdir(parents=True, exist_ok=True)
+            (Path(retain_dir) / file_name).write_bytes(data)
+        return self.add_text(text, file_name)
+
+    def add_text(self, text: str, source_name: str) -> dict:
+        """
+        Parses and scores extracted text in-process. The cleaned text is kept in text_dir
+        for the dashboard's detail view and for later runs.
+        """
+        cleaned = clean_text(text)
+        key = f"{Path(source_name).stem}.txt"
+        self.text_dir.mkdir(parents=True, exist_ok=True)
+        (self.text_dir / key).write_text(cleaned, encoding="utf-8")
+        if self.search_index is not None:
+            self.search_index.add(key, cleaned)
+        self.add_entity(parse_text(cleaned, key, self.skills_list))
+        return self.components[key]
+
+    def remove_file(self, source_path: Path) -> bool:
+        """
+        Drops a deleted CV from the ranking. Returns False if it wasn't ranked.
+        """
+        key = f"{source_path.stem}.txt"
+        (self.text_dir / key).unlink(missing_ok=True)
+        if self.search_index is not None:
+            self.search_index.remove(key)
+        found = key in self.entities
+        for table in (self.entities, self.vectors, self.components):
+            table.pop(key, None)
+        return found
+
+    def ranking(self) -> list:
+        rows = [{f: comp[f] for f in RANKING_SCHEMA.names} for comp in self.components.values()]
+        rows.sort(key=lambda x: x["Score"], reverse=True)
+        return rows
+
+    def save(self):
+        """
+        Rewrites the ranking, component, entity and vector artifacts in the same layout main.py produces.
+        """
+        entities = list(self.entities.values())
+        ranking = self.ranking()
+        write_rows(entities, self.outputs_dir / "entities.json", ENTITY_SCHEMA)
+        write_rows(entities, self.outputs_dir / "entities.parquet", ENTITY_SCHEMA)
+        (self.outputs_dir / "vectors.json").write_text(json.dumps({
+            "candidates": list(self.vectors.values()),
+            "vacancy": self.vacancy_vec,
+            "skill_set": list(self.skill_set)
+        }, indent=2), encoding="utf-8")
+        write_rows(list(self.components.values()), self.outputs_dir / "components.parquet",
+                   component_schema(self.weights))
+        write_rows(ranking, self.outputs_dir / "ranking.parquet", RANKING_SCHEMA)
+        write_rows(ranking, self.outputs_dir / "ranking.csv", RANKING_SCHEMA)
+        self.loaded_stamp = self.stamp()
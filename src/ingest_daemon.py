@@ -0,0 +1,193 @@
+import os
+import queue
+import stat
+import threading
+import time
+from pathlib import Path
+from text_extraction import SUPPORTED_SUFFIXES
+from incremental import RankingState
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # fall back to polling
+    Observer = None
+    FileSystemEventHandler = object
+
+
+def is_candidate_file(path: Path) -> bool:
+    return path.suffix.lower() in SUPPORTED_SUFFIXES and not path.name.startswith((".", "~$"))
+
+
+class _EventHandler(FileSystemEventHandler):
+    # Open/read events are ignored, otherwise extracting a file would re-trigger it
+    EVENT_TYPES = {"created", "modified", "moved", "deleted", "closed"}
+
+    def __init__(self, events: queue.Queue):
+        self.events = events
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in self.EVENT_TYPES:
+            return
+        for attr in ("src_path", "dest_path"):
+            path = getattr(event, attr, None)
+            if path and is_candidate_file(Path(os.fsdecode(path))):
+                self.events.put(Path(os.fsdecode(path)))
+
+
+class PollingWatcher(threading.Thread):
+    """
+    Fallback watcher: compares (mtime, size) snapshots of the watched folders every interval.
+    """
+
+    def __init__(self, dirs, events: queue.Queue, interval: float = 1.0):
+        super().__init__(daemon=True)
+        self.dirs = dirs
+        self.events = events
+        self.interval = interval
+        self.snapshot = self.scan()
+        self.stopped = threading.Event()
+
+    def scan(self) -> dict:
+        snapshot = {}
+        for d in self.dirs:
+            for path in d.iterdir():
+                if not is_candidate_file(path):
+                    continue
+                try:
+                    st = path.stat()
+                except FileNotFoundError:  # deleted or renamed since iterdir(), e.g. a temp file
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            current = self.scan()
+            for path in current.keys() | self.snapshot.keys():
+                if current.get(path) != self.snapshot.get(path):
+                    self.events.put(path)
+            self.snapshot = current
+
+    def stop(self):
+        self.stopped.set()
+
+
+def stale_files(dirs, state: RankingState) -> list:
+    """
+    Files that changed while the daemon was not running: not yet ranked, or newer than their text.
+    """
+    stale = []
+    for d in dirs:
+        for path in sorted(d.iterdir()):
+            if not path.is_file() or not is_candidate_file(path):
+                continue
+            txt_path = state.text_dir / f"{path.stem}.txt"
+            try:
+                if txt_path.name not in state.entities or path.stat().st_mtime > txt_path.stat().st_mtime:
+                    stale.append(path)
+            except FileNotFoundError:
+                # A missing text means the CV needs processing; a missing CV is gone already
+                if path.exists():
+                    stale.append(path)
+    return stale
+
+
+def process_batch(state: RankingState, paths) -> int:
+    """
+    Applies one debounced batch of changes and rewrites the ranking once.
+    """
+    start = time.perf_counter()
+    changed = 0
+    with state.lock():
+        # Pick up rankings written meanwhile by main.py or dashboard uploads before changing them
+        if state.refresh():
+            print(f"Reloaded outputs ({len(state.components)} candidates)")
+        for path in sorted(paths):
+            try:
+                if path.exists():
+                    comp = state.process_file(path)
+                    print(f"Ranked {path.name}: score {comp['Score']}")
+                    changed += 1
+                elif state.remove_file(path):
+                    print(f"Removed {path.name}")
+                    changed += 1
+            except Exception as e:
+                print(f"Warning: could not ingest {path}: {e}")
+        if changed:
+            state.save()
+    if changed:
+        print(f"Updated ranking ({len(state.components)} candidates, {changed} changed) "
+              f"in {time.perf_counter() - start:.2f}s")
+    return changed
+
+
+def watch(dirs, outputs_dir: Path, vacancy_json: Path, debounce: float = 1.0, max_wait: float = 5.0,
+          max_batch: int = 64, poll: bool = False, poll_interval: float = 1.0, search_index: Path = None):
+    """
+    Watches the input folders and incrementally re-ranks new, changed or deleted CVs.
+    Events are debounced: a batch is processed once no event arrived for `debounce` seconds,
+    or when it reaches max_batch files, or max_wait seconds after its first event.
+    """
+    dirs = [Path(d) for d in dirs]
+    for d in dirs:
+        d.mkdir(parents=True, exist_ok=True)
+    state = RankingState(outputs_dir, vacancy_json, search_index=search_index)
+    process_batch(state, stale_files(dirs, state))
+
+    events = queue.Queue()
+    if Observer is not None and not poll:
+        watcher = Observer()
+        handler = _EventHandler(events)
+        for d in dirs:
+            watcher.schedule(handler, str(d), recursive=False)
+    else:
+        watcher = PollingWatcher(dirs, events, poll_interval)
+    watcher.start()
+    print(f"Watching {', '.join(str(d) for d in dirs)} (Ctrl+C to stop)")
+
+    pending = set()
+    first_event = last_event = 0.0
+    try:
+        while True:
+            try:
+                path = events.get(timeout=debounce / 4 if pending else None)
+                now = time.monotonic()
+                if not pending:
+                    first_event = now
+                pending.add(path)
+                last_event = now
+            except queue.Empty:
+                now = time.monotonic()
+            if pending and (now - last_event >= debounce or now - first_event >= max_wait
+                            or len(pending) >= max_batch):
+                batch, pending = pending, set()
+                process_batch(state, batch)
+    except KeyboardInterrupt:
+        print("Stopping watcher")
+    finally:
+        watcher.stop()
+        watcher.join()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Watch CV folders and incrementally update the ranking")
+    parser.add_argument("--input-dir", type=Path, action="append", required=True,
+                        help="Folder to watch for CVs; may be repeated")
+    parser.add_argument("--outputs-dir", type=Path, default=Path("outputs"), help="Pipeline outputs folder")
+    parser.add_argument("--vacancy-json", type=Path, default=Path("outputs/vacancy.json"),
+                        help="Parsed vacancy requirements")
+    parser.add_argument("--debounce", type=float, default=1.0, help="Quiet period before a batch is processed (s)")
+    parser.add_argument("--max-wait", type=float, default=5.0, help="Longest a change waits during a burst (s)")
+    parser.add_argument("--max-batch", type=int, default=64, help="Process a batch once it has this many files")
+    parser.add_argument("--poll", action="store_true", help="Use polling instead of native file events")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--search-index", type=Path, default=Path("outputs/search.db"),
+                        help="Full-text index to keep up to date")
+    args = parser.parse_args()
+
+    watch(args.input_dir, args.outputs_dir, args.vacancy_json, args.debounce, args.max_wait,
+          args.max_batch, args.poll, args.poll_interval, args.search_index)
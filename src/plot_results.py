@@ -1,12 +1,14 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
+from artifacts import read_table
+from profiling import profile_stage
 
 def plot_scores(ranking_csv: Path, output_dir: Path):
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    df = pd.read_csv(ranking_csv)
+    # Only the plotted columns are loaded; Parquet/Arrow rankings are memory-mapped
+    df = read_table(ranking_csv, columns=["name", "Score", "Skill Matches", "Years of Experiences"]).to_pandas()
 
     # Bar chart: Overall scores
     plt.figure(figsize=(10, 6))
@@ -42,8 +44,10 @@ def plot_scores(ranking_csv: Path, output_dir: Path):
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Generate plots from ranking results")
-    parser.add_argument("--ranking-csv", type=Path, required=True, help="CSV file with candidate scores")
+    parser.add_argument("--ranking-csv", type=Path, required=True, help="Ranking file with candidate scores (.csv, .parquet or .arrow)")
     parser.add_argument("--output-dir", type=Path, required=True, help="Folder to save plots")
+    parser.add_argument("--profile", type=Path, help="Optional: write cProfile/tracemalloc/stack samples here")
     args = parser.parse_args()
 
-    plot_scores(args.ranking_csv, args.output_dir)
+    with profile_stage("plot_results", args.profile):
+        plot_scores(args.ranking_csv, args.output_dir)
@@ -0,0 +1,193 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from multiprocessing import util
+from pathlib import Path
+
+# Propagate profiling to ProcessPoolExecutor workers through the environment
+PROFILE_DIR_ENV = "CV_PROFILE_DIR"
+PROFILE_STAGE_ENV = "CV_PROFILE_STAGE"
+
+_active = None
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples one thread's Python stack at a fixed interval and counts collapsed stacks
+    (root;...;leaf), the input format of flamegraph.pl / speedscope / inferno.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class StageProfiler:
+    """
+    Captures cProfile stats, sampled stacks, a tracemalloc snapshot and per-document timings
+    for one stage in one process, written as <stage>.<tag>.{pstats,collapsed,memory.txt,docs.tsv}.
+    """
+
+    def __init__(self, stage: str, out_dir: Path, tag: str = "main", interval: float = 0.005):
+        self.stage = stage
+        self.out_dir = Path(out_dir)
+        self.tag = tag
+        self.interval = interval
+        self.documents = []
+        self.started_tracemalloc = False
+
+    def prefix(self) -> Path:
+        return self.out_dir / f"{self.stage}.{self.tag}"
+
+    def start(self):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        if tracemalloc.is_tracing():
+            tracemalloc.clear_traces()  # e.g. inherited from a forked parent
+        else:
+            tracemalloc.start(25)
+            self.started_tracemalloc = True
+        self.sampler = StackSampler(threading.get_ident(), self.interval)
+        self.sampler.start()
+        self.profile = cProfile.Profile()
+        self.start_time = time.perf_counter()
+        self.profile.enable()
+        return self
+
+    def record_document(self, name: str, seconds: float):
+        self.documents.append((name, seconds))
+
+    def stop(self):
+        self.profile.disable()
+        elapsed = time.perf_counter() - self.start_time
+        self.sampler.stop()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+
+        prefix = self.prefix()
+        self.profile.dump_stats(f"{prefix}.pstats")
+        with open(f"{prefix}.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in self.sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(f"{prefix}.memory.txt", "w", encoding="utf-8") as f:
+            f.write(f"wall time: {elapsed:.3f}s\n")
+            f.write(f"traced memory: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n\n")
+            for stat in snapshot.statistics("lineno")[:30]:
+                f.write(f"{stat}\n")
+        with open(f"{prefix}.docs.tsv", "w", encoding="utf-8") as f:
+            for name, seconds in self.documents:
+                f.write(f"{name}\t{seconds:.6f}\n")
+
+
+def write_report(stage: str, out_dir: Path, top: int = 20):
+    """
+    Merges the main and worker outputs of a stage: <stage>.all.pstats and the top slowest documents.
+    """
+    out_dir = Path(out_dir)
+    stats_files = sorted(p for p in out_dir.glob(f"{stage}.*.pstats") if not p.name.endswith(".all.pstats"))
+    if stats_files:
+        stats = pstats.Stats(str(stats_files[0]))
+        for path in stats_files[1:]:
+            stats.add(str(path))
+        stats.dump_stats(str(out_dir / f"{stage}.all.pstats"))
+
+    documents = []
+    for path in out_dir.glob(f"{stage}.*.docs.tsv"):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            name, _, seconds = line.rpartition("\t")
+            documents.append((float(seconds), name, path.name.split(".")[-3]))
+    documents.sort(reverse=True)
+    with open(out_dir / f"{stage}.slowest.txt", "w", encoding="utf-8") as f:
+        for seconds, name, tag in documents[:top]:
+            f.write(f"{seconds:9.3f}s  {name}  [{tag}]\n")
+    print(f"Profile for {stage} -> {out_dir} ({len(stats_files)} processes, {len(documents)} documents)")
+
+
+@contextmanager
+def _profile_stage(stage: str, out_dir: Path):
+    global _active
+    previous_env = {key: os.environ.get(key) for key in (PROFILE_DIR_ENV, PROFILE_STAGE_ENV)}
+    os.environ[PROFILE_DIR_ENV] = str(out_dir)
+    os.environ[PROFILE_STAGE_ENV] = stage
+    _active = StageProfiler(stage, out_dir).start()
+    try:
+        yield _active
+    finally:
+        _active.stop()
+        _active = None
+        for key, value in previous_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        write_report(stage, out_dir)
+
+
+def profile_stage(stage: str, out_dir: Path = None):
+    """
+    Context manager profiling a whole stage (and its worker processes) into out_dir.
+    A no-op when out_dir is None, so CLIs can pass --profile straight through.
+    """
+    if out_dir is None:
+        return nullcontext()
+    return _profile_stage(stage, Path(out_dir))
+
+
+@contextmanager
+def document_timer(name: str):
+    """
+    Records how long one document took in the active stage profiler (no-op when not profiling).
+    """
+    if _active is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _active.record_document(name, time.perf_counter() - start)
+
+
+def init_worker_profiling():
+    """
+    ProcessPoolExecutor initializer: starts a per-worker profiler when the parent stage is profiled.
+    Results are written when the worker process exits.
+    """
+    global _active
+    out_dir = os.environ.get(PROFILE_DIR_ENV)
+    if not out_dir or (_active is not None and _active.tag != "main"):
+        return
+    if _active is not None:
+        # Forked from the profiled parent: its profiler is still installed in this process;
+        # disable it before dropping it, or destroying it fails with "Cannot install a profile function"
+        _active.profile.disable()
+        _active = None
+    _active = StageProfiler(os.environ.get(PROFILE_STAGE_ENV, "stage"), out_dir, tag=f"worker-{os.getpid()}")
+    _active.start()
+    # Finalizers with an exitpriority run when a multiprocessing worker shuts down
+    util.Finalize(None, _active.stop, exitpriority=100)
@@ -0,0 +1,97 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+ENTITY_COLUMNS = ["skills", "education_level"]
+SORTABLE_COLUMNS = ["Score", "name", "Skill Matches", "Years of Experiences", "education_level"]
+# Added by with_relevance when the shortlist is narrowed by a full-text search
+RELEVANCE_COLUMN = "Relevance"
+
+
+def build_candidate_table(ranking: pa.Table, entities: pa.Table = None) -> pa.Table:
+    """
+    Attaches each candidate's skills and education level to the ranking, matched on the
+    'file' column (names are not unique). Candidates without entities get nulls.
+    """
+    if entities is None:
+        for column in ENTITY_COLUMNS:
+            ranking = ranking.append_column(column, pa.nulls(ranking.num_rows, pa.list_(pa.string())
+                                                    if column == "skills" else pa.float64()))
+        return ranking
+    positions = pc.index_in(ranking.column("file"), value_set=entities.column("file"))
+    matched = entities.select(ENTITY_COLUMNS).take(positions)
+    for column in ENTITY_COLUMNS:
+        ranking = ranking.append_column(column, matched.column(column))
+    return ranking
+
+
+def with_relevance(table: pa.Table, hits) -> pa.Table:
+    """
+    Keeps only the candidates found by a full-text search (SearchIndex.search hits, matched on
+    'file') and adds their BM25 score as a 'Relevance' column.
+    """
+    files = pa.array([hit["file"] for hit in hits], pa.string())
+    positions = pc.index_in(table.column("file"), value_set=files)
+    found = pc.is_valid(positions)
+    relevance = pa.array([hit["relevance"] for hit in hits], pa.float64())
+    return table.filter(found).append_column(RELEVANCE_COLUMN, relevance.take(positions.filter(found)))
+
+
+def has_all_skills(skills: pa.ChunkedArray, required) -> np.ndarray:
+    """
+    Boolean mask of rows whose skill list contains every skill in required (case-insensitive).
+    """
+    skills = skills.combine_chunks() if isinstance(skills, pa.ChunkedArray) else skills
+    mask = np.ones(len(skills), dtype=bool)
+    flat = pc.utf8_lower(pc.list_flatten(skills))
+    parents = pc.list_parent_indices(skills).to_numpy()
+    for skill in required:
+        hit = pc.equal(flat, skill.lower().strip()).to_numpy(zero_copy_only=False)
+        present = np.zeros(len(skills), dtype=bool)
+        present[parents[hit]] = True
+        mask &= present
+    return mask
+
+
+def query_candidates(table: pa.Table, min_score=None, max_score=None, skills=(), field=None,
+                     min_experience=None, max_experience=None, search=None, sort_by="Score",
+                     descending=True, page=0, page_size=25):
+    """
+    Filters, sorts and paginates the candidate table entirely in Arrow.
+    Only the requested page is materialised; returns (page_table, total_matching_rows).
+    """
+    mask = pa.array(np.ones(table.num_rows, dtype=bool))
+    if min_score is not None:
+        mask = pc.and_(mask, pc.greater_equal(table.column("Score"), min_score))
+    if max_score is not None:
+        mask = pc.and_(mask, pc.less_equal(table.column("Score"), max_score))
+    if min_experience is not None:
+        mask = pc.and_(mask, pc.greater_equal(table.column("Years of Experiences"), min_experience))
+    if max_experience is not None:
+        mask = pc.and_(mask, pc.less_equal(table.column("Years of Experiences"), max_experience))
+    if field:
+        mask = pc.and_(mask, pc.equal(pc.utf8_lower(table.column("Education Field")), field.lower()))
+    if search:
+        term = search.lower().strip()
+        in_name = pc.match_substring(pc.utf8_lower(table.column("name")), term)
+        in_file = pc.match_substring(pc.utf8_lower(table.column("file")), term)
+        mask = pc.and_(mask, pc.or_(in_name, in_file))
+    if skills:
+        mask = pc.and_(mask, pa.array(has_all_skills(table.column("skills"), skills)))
+
+    filtered = table.filter(pc.fill_null(mask, False))
+    if sort_by not in SORTABLE_COLUMNS + [RELEVANCE_COLUMN] or sort_by not in table.column_names:
+        raise ValueError(f"Cannot sort by {sort_by}, expected one of {SORTABLE_COLUMNS}")
+    order = "descending" if descending else "ascending"
+    # Secondary key on file keeps pages stable between reruns
+    indices = pc.sort_indices(filtered, sort_keys=[(sort_by, order), ("file", "ascending")])
+    start = max(page, 0) * page_size
+    return filtered.take(indices[start:start + page_size]), filtered.num_rows
+
+
+def distinct_values(table: pa.Table, column: str) -> list:
+    """
+    Sorted non-empty distinct values of a string column, for filter widgets.
+    """
+    values = pc.unique(table.column(column)).to_pylist()
+    return sorted(v for v in values if v)
@@ -1,18 +1,21 @@
 import json
-import csv
 from pathlib import Path
 import difflib
 import math
+import numpy as np
+import pyarrow as pa
+from artifacts import RANKING_SCHEMA, COMPONENT_SCHEMA, read_table, write_rows, write_table
+from profiling import profile_stage
 
-def compute_score(candidate_vec, vacancy_vec, weights=None):
+DEFAULT_WEIGHTS = {'skills': 0.5, 'experience': 0.3, 'education': 0.2}
+
+
+def score_components(candidate_vec, vacancy_vec):
     """
-    Compute weighted match score between a candidate and the vacancy.
-    Uses cosine similarity for skills, level + field education scoring,
-    and clamped experience scoring.
+    Computes the unweighted component scores between a candidate and the vacancy:
+    skills cosine similarity, clamped experience ratio, education level (0 or 0.5)
+    and education field (0 or 0.5). Also returns the list of matched skills.
     """
-    if weights is None:
-        weights = {'skills': 0.5, 'experience': 0.3, 'education': 0.2}
-
     # Skill vectors
     cand_skills = set([k for k, v in candidate_vec.get("skill_vector", {}).items() if v])
     vac_skills = set([k for k, v in vacancy_vec.get("skill_vector", {}).items() if v])
@@ -41,53 +44,175 @@ def compute_score(candidate_vec, vacancy_vec, weights=None):
     vac_field = vacancy_vec.get('required_education_field', '').lower()
     level_score = 0.5 if cand_level >= vac_level else 0
     field_score = 0.5 if vac_field and vac_field in cand_field else 0
-    education_score = level_score + field_score
 
-    # Final weighted score
+    return {
+        'skills_score': skills_score,
+        'experience_score': experience_score,
+        'education_level_score': level_score,
+        'education_field_score': field_score,
+    }, matched_skills
+
+
+def weighted_score(components, weights=None):
+    """
+    Combines component scores into the final rounded score.
+    """
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
+    education_score = components['education_level_score'] + components['education_field_score']
     final_score = (
-        weights["skills"] * skills_score +
-        weights["experience"] * experience_score +
+        weights["skills"] * components['skills_score'] +
+        weights["experience"] * components['experience_score'] +
         weights["education"] * education_score
     )
+    return round(final_score, 4)
+
+
+def compute_score(candidate_vec, vacancy_vec, weights=None):
+    """
+    Compute weighted match score between a candidate and the vacancy.
+    Uses cosine similarity for skills, level + field education scoring,
+    and clamped experience scoring.
+    """
+    components, matched_skills = score_components(candidate_vec, vacancy_vec)
+    return weighted_score(components, weights), {
+        'Skill Matches': len(matched_skills),
+        'Years of Experiences': candidate_vec.get('experience_years', 0),
+        'Education Field': candidate_vec.get('education_field', '')
+    }
+
 
-    return round(final_score, 4), {
+def score_candidate(candidate_vec, vacancy_vec, weights=None):
+    """
+    Scores one candidate vector and returns (ranking_row, components_row),
+    matching RANKING_SCHEMA and COMPONENT_SCHEMA respectively.
+    """
+    components, matched_skills = score_components(candidate_vec, vacancy_vec)
+    row = {
+        'file': candidate_vec['file'],
+        'name': candidate_vec['name'],
+        'Score': weighted_score(components, weights),
         'Skill Matches': len(matched_skills),
         'Years of Experiences': candidate_vec.get('experience_years', 0),
         'Education Field': candidate_vec.get('education_field', '')
     }
+    return row, {**row, **components}
+
+
+def component_schema(weights=None) -> pa.Schema:
+    """
+    COMPONENT_SCHEMA tagged with the weights its Score column was computed with.
+    """
+    return COMPONENT_SCHEMA.with_metadata({'weights': json.dumps(weights or DEFAULT_WEIGHTS)})
+
+
+def load_weights(components_path: Path) -> dict:
+    """
+    Weights a components artifact was scored with; DEFAULT_WEIGHTS if it doesn't record them
+    (CSV/JSON, or written before they were stored).
+    """
+    metadata = read_table(components_path, columns=['file']).schema.metadata or {}
+    if b'weights' not in metadata:
+        return dict(DEFAULT_WEIGHTS)
+    return {**DEFAULT_WEIGHTS, **json.loads(metadata[b'weights'])}
+
+
+def rerank(components: pa.Table, weights=None) -> pa.Table:
+    """
+    Recomputes the final score for every candidate from cached component scores
+    and returns the ranking (RANKING_SCHEMA) sorted by the new score.
+    Vectorised over the whole table, so no parsing or vectorisation is repeated.
+    """
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
 
-def rank_candidates(vector_json: Path, output_csv: Path):
+    def column(name):
+        return components.column(name).to_numpy(zero_copy_only=False).astype(np.float64)
+
+    education = column('education_level_score') + column('education_field_score')
+    scores = np.round(
+        weights['skills'] * column('skills_score') +
+        weights['experience'] * column('experience_score') +
+        weights['education'] * education,
+        4
+    )
+    # Stable sort keeps the original order among ties, like list.sort in rank_candidates
+    order = np.argsort(-scores, kind='stable')
+    ranking = components.select([f.name for f in RANKING_SCHEMA if f.name != 'Score'])
+    ranking = ranking.append_column('Score', pa.array(scores)).select(RANKING_SCHEMA.names)
+    return ranking.take(pa.array(order)).cast(RANKING_SCHEMA)
+
+
+def parse_weights(spec: str) -> dict:
+    """
+    Parses 'skills=0.6,experience=0.2,education=0.2' into a weights dict.
+    Missing keys fall back to DEFAULT_WEIGHTS.
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        key, _, value = item.partition('=')
+        key = key.strip()
+        if key not in DEFAULT_WEIGHTS:
+            raise ValueError(f"Unknown weight '{key}', expected one of {sorted(DEFAULT_WEIGHTS)}")
+        weights[key] = float(value)
+    return weights
+
+
+def rank_candidates(vector_json: Path, output_paths, components_path: Path = None, weights=None):
+    """
+    Scores every candidate and writes the sorted ranking to each path in output_paths.
+    The format of each output (CSV, Parquet, Arrow IPC) is chosen from its suffix.
+    If components_path is given, the per-candidate component scores are saved there, along with
+    the weights, so the ranking can later be re-weighted with rerank().
+    """
+    if isinstance(output_paths, (str, Path)):
+        output_paths = [output_paths]
     data = json.loads(vector_json.read_text(encoding='utf-8'))
     cand_vecs = data['candidates']
     vac_vec = data['vacancy']
 
     rankings = []
+    components = []
     for c in cand_vecs:
-        score, breakdown = compute_score(c, vac_vec)
-        rankings.append({
-            'file': c['file'],
-            'name': c['name'],
-            'Score': score,
-            'Skill Matches': breakdown['Skill Matches'],
-            'Years of Experiences': c.get('experience_years', 0),
-            'Education Field': c.get('education_field', '')
-        })
+        row, comp = score_candidate(c, vac_vec, weights)
+        rankings.append(row)
+        components.append(comp)
 
     rankings.sort(key=lambda x: x['Score'], reverse=True)
 
-    with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['file', 'name', 'Score', 'Skill Matches', 'Years of Experiences', 'Education Field']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rankings:
-            writer.writerow(row)
+    for output_path in output_paths:
+        write_rows(rankings, output_path, RANKING_SCHEMA)
+        print(f"✅ Ranking complete -> {output_path}")
+    if components_path:
+        write_rows(components, components_path, component_schema(weights))
+        print(f"Component scores -> {components_path}")
 
-    print(f"✅ Ranking complete -> {output_csv}")
 
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser(description='Rank candidates against vacancy')
-    parser.add_argument('--vector-json', type=Path, required=True, help='Path to vectorized data JSON')
-    parser.add_argument('--output-csv', type=Path, required=True, help='Path for output ranking CSV')
+    parser.add_argument('--vector-json', type=Path, help='Path to vectorized data JSON')
+    parser.add_argument('--rerank', type=Path, help='Re-rank from a saved components file instead of vectors')
+    parser.add_argument('--output-csv', type=Path, help='Path for output ranking CSV')
+    parser.add_argument('--output', type=Path, action='append', default=[],
+                        help='Additional ranking output (.parquet, .arrow or .csv); may be repeated')
+    parser.add_argument('--components', type=Path, help='Optional: save per-candidate component scores here')
+    parser.add_argument('--weights', type=str, default='',
+                        help="Score weights, e.g. 'skills=0.6,experience=0.2,education=0.2'")
+    parser.add_argument('--profile', type=Path, help='Optional: write cProfile/tracemalloc/stack samples here')
     args = parser.parse_args()
-    rank_candidates(args.vector_json, args.output_csv)
+    outputs = ([args.output_csv] if args.output_csv else []) + args.output
+    if not outputs:
+        parser.error('at least one of --output-csv or --output is required')
+    if bool(args.vector_json) == bool(args.rerank):
+        parser.error('exactly one of --vector-json or --rerank is required')
+    weights = parse_weights(args.weights)
+
+    with profile_stage('scoring', args.profile):
+        if args.rerank:
+            ranking = rerank(read_table(args.rerank), weights)
+            for output_path in outputs:
+                write_table(ranking, output_path)
+                print(f"✅ Re-ranked {ranking.num_rows} candidates -> {output_path}")
+        else:
+            rank_candidates(args.vector_json, outputs, args.components, weights)
@@ -0,0 +1,186 @@
+import re
+import sqlite3
+import time
+from pathlib import Path
+from profiling import profile_stage
+
+INDEX_VERSION = 1
+
+# Free-text query syntax: "quoted phrases", prefix* terms and plain terms
+_QUERY_TERM_RE = re.compile(r'"([^"]+)"|(\S+)')
+_WORD_RE = re.compile(r"\w+")
+
+
+def build_match_query(query: str, match_all: bool = False) -> str:
+    """
+    Turns a recruiter query such as 'BIM coordinator "site supervisor" arch*' into an FTS5
+    MATCH expression. Terms are OR-ed (BM25 ranks documents matching more of them first)
+    unless match_all is set; punctuation is dropped so user input can't break the syntax.
+    """
+    parts = []
+    for phrase, term in _QUERY_TERM_RE.findall(query):
+        words = _WORD_RE.findall(phrase or term)
+        if not words:
+            continue
+        if phrase or len(words) > 1:
+            # Quoted phrases and hyphenated words ("3d-max") match as consecutive tokens
+            parts.append('"' + " ".join(words) + '"')
+        elif term.endswith("*"):
+            parts.append(f'"{words[0]}"*')
+        else:
+            parts.append(f'"{words[0]}"')
+    return (" AND " if match_all else " OR ").join(parts)
+
+
+class SearchIndex:
+    """
+    Full-text index over cleaned CV texts in a single SQLite file (FTS5 inverted index with
+    token positions, so BM25 ranking and phrase queries come built in). Documents are keyed by
+    their text file name, the same 'file' key as the ranking, and are added, replaced or removed
+    one at a time; sync() only re-reads texts whose size or mtime changed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # The dashboard shares one index across Streamlit's script threads
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY, file TEXT UNIQUE, size INTEGER, mtime_ns INTEGER, indexed_at REAL
+            );
+            -- rowid = docs.id, so replacing or deleting one document is a point lookup
+            CREATE VIRTUAL TABLE IF NOT EXISTS cv_text USING fts5(
+                body, tokenize = 'unicode61 remove_diacritics 2'
+            );
+            INSERT OR IGNORE INTO meta VALUES ('version', '{INDEX_VERSION}');
+        """)
+        version = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        if int(version) != INDEX_VERSION:
+            raise ValueError(f"Search index {self.path} has version {version}, expected {INDEX_VERSION}; "
+                             f"delete it and re-run sync")
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def _delete(self, file: str) -> bool:
+        row = self.conn.execute("SELECT id FROM docs WHERE file = ?", (file,)).fetchone()
+        if row is None:
+            return False
+        self.conn.execute("DELETE FROM cv_text WHERE rowid = ?", row)
+        self.conn.execute("DELETE FROM docs WHERE id = ?", row)
+        return True
+
+    def add(self, file: str, text: str, size: int = None, mtime_ns: int = None, commit: bool = True):
+        """
+        Indexes one document, replacing any previous version with the same file name.
+        """
+        self._delete(file)
+        doc_id = self.conn.execute("INSERT INTO docs (file, size, mtime_ns, indexed_at) VALUES (?, ?, ?, ?)",
+                                   (file, size, mtime_ns, time.time())).lastrowid
+        self.conn.execute("INSERT INTO cv_text (rowid, body) VALUES (?, ?)", (doc_id, text))
+        if commit:
+            self.conn.commit()
+
+    def remove(self, file: str, commit: bool = True) -> bool:
+        found = self._delete(file)
+        if commit:
+            self.conn.commit()
+        return found
+
+    def sync(self, text_dirs, prune: bool = True) -> dict:
+        """
+        Brings the index in line with the .txt files in text_dirs: new or changed texts are
+        (re)indexed, and with prune, documents whose text is gone are dropped.
+        Returns counts of added, updated, removed and unchanged documents.
+        """
+        known = {file: (size, mtime_ns) for file, size, mtime_ns in
+                 self.conn.execute("SELECT file, size, mtime_ns FROM docs")}
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        seen = set()
+        with self.conn:
+            for text_dir in text_dirs:
+                for txt_path in sorted(Path(text_dir).glob("*.txt")):
+                    if txt_path.name in seen:
+                        print(f"Warning: {txt_path} duplicates an already indexed file name, skipped")
+                        continue
+                    seen.add(txt_path.name)
+                    stat = txt_path.stat()
+                    previous = known.get(txt_path.name)
+                    if previous == (stat.st_size, stat.st_mtime_ns):
+                        counts["unchanged"] += 1
+                        continue
+                    self.add(txt_path.name, txt_path.read_text(encoding="utf-8"),
+                             stat.st_size, stat.st_mtime_ns, commit=False)
+                    counts["updated" if previous else "added"] += 1
+            if prune:
+                for file in known.keys() - seen:
+                    self._delete(file)
+                    counts["removed"] += 1
+        return counts
+
+    def optimize(self):
+        """
+        Merges the FTS5 index segments; worth running after a large sync.
+        """
+        self.conn.execute("INSERT INTO cv_text (cv_text) VALUES ('optimize')")
+        self.conn.commit()
+
+    def search(self, query: str, limit: int = 50, offset: int = 0, match_all: bool = False,
+               snippets: bool = True) -> list:
+        """
+        Ranked candidates for a free-text query: [{"file", "relevance", "snippet"}], best first.
+        relevance is the negated FTS5 BM25 score, so higher is better.
+        """
+        match = build_match_query(query, match_all)
+        if not match:
+            return []
+        snippet = "snippet(cv_text, 0, '[', ']', ' … ', 12)" if snippets else "''"
+        rows = self.conn.execute(
+            f"SELECT docs.file, -bm25(cv_text), {snippet} FROM cv_text JOIN docs ON docs.id = cv_text.rowid "
+            f"WHERE cv_text MATCH ? ORDER BY bm25(cv_text) LIMIT ? OFFSET ?",
+            (match, limit, offset)
+        ).fetchall()
+        return [{"file": file, "relevance": relevance, "snippet": text} for file, relevance, text in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Full-text search index over extracted CV texts")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_sync = sub.add_parser("sync", help="Index new or changed CV texts and drop deleted ones")
+    p_sync.add_argument("--text-dir", type=Path, action="append", required=True,
+                        help="Folder with cleaned CV .txt files; may be repeated")
+    p_sync.add_argument("--index", type=Path, required=True, help="Index database, e.g. outputs/search.db")
+    p_sync.add_argument("--keep-missing", action="store_true", help="Don't drop documents whose text is gone")
+    p_sync.add_argument("--profile", type=Path, help="Optional: write cProfile/tracemalloc/stack samples here")
+
+    p_search = sub.add_parser("search", help="Query the index")
+    p_search.add_argument("query", help='Free text, e.g. \'BIM coordinator Revit "site supervisor"\'')
+    p_search.add_argument("--index", type=Path, required=True)
+    p_search.add_argument("--limit", type=int, default=20)
+    p_search.add_argument("--all", action="store_true", help="Require every term instead of ranking partial matches")
+
+    args = parser.parse_args()
+    if args.command == "sync":
+        with profile_stage("search_index", args.profile):
+            index = SearchIndex(args.index)
+            counts = index.sync(args.text_dir, prune=not args.keep_missing)
+            if counts["added"] + counts["updated"] + counts["removed"] > 1000:
+                index.optimize()
+        print(f"Search index: {len(index)} documents ({counts['added']} added, {counts['updated']} updated, "
+              f"{counts['removed']} removed, {counts['unchanged']} unchanged) -> {args.index}")
+    else:
+        index = SearchIndex(args.index)
+        start = time.perf_counter()
+        hits = index.search(args.query, args.limit, match_all=args.all)
+        for hit in hits:
+            print(f"{hit['relevance']:8.3f}  {hit['file']}  {hit['snippet']}")
+        print(f"{len(hits)} results in {(time.perf_counter() - start) * 1000:.1f} ms")
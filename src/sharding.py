@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from text_extraction import SUPPORTED_SUFFIXES, batch_extract
+import vectorize
+from scoring import parse_weights, rank_candidates
+from profiling import profile_stage
+from artifacts import ENTITY_SCHEMA, read_rows, write_rows
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """
+    Returns the hex SHA-256 of a file's contents, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def shard_for(sha256: str, num_shards: int) -> int:
+    """
+    Deterministic shard assignment from a content hash, independent of file order or host.
+    """
+    return int(sha256[:16], 16) % num_shards
+
+
+def plan_shards(input_dir: Path, num_shards: int, manifest_path: Path) -> dict:
+    """
+    Hashes every supported file in input_dir and writes a manifest assigning each one to a shard.
+    The same corpus always yields the same manifest.
+    """
+    if num_shards < 1:
+        raise ValueError("num_shards must be at least 1")
+    entries = []
+    for file_path in sorted(input_dir.iterdir()):
+        if not file_path.is_file() or file_path.suffix.lower() not in SUPPORTED_SUFFIXES:
+            continue
+        sha = file_sha256(file_path)
+        entries.append({
+            "file": file_path.name,
+            "sha256": sha,
+            "size": file_path.stat().st_size,
+            "shard": shard_for(sha, num_shards)
+        })
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "input_dir": str(input_dir.resolve()),
+        "num_shards": num_shards,
+        "files": entries
+    }
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    counts = [sum(1 for e in entries if e["shard"] == i) for i in range(num_shards)]
+    print(f"Planned {len(entries)} files into {num_shards} shards {counts} -> {manifest_path}")
+    return manifest
+
+
+def load_manifest(manifest_path: Path) -> dict:
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version in {manifest_path}: {manifest.get('version')}")
+    return manifest
+
+
+def shard_dir(work_dir: Path, shard: int) -> Path:
+    return work_dir / f"shard-{shard:04d}"
+
+
+def run_shard(manifest_path: Path, shard: int, vacancy_json: Path, work_dir: Path, input_dir: Path = None,
+              workers: int = None):
+    """
+    Processes one shard independently: text extraction, entity parsing and vectorisation.
+    Outputs go to work_dir/shard-NNNN/, finishing with a done.json marker for the merge step.
+    input_dir overrides the manifest's directory when the corpus is mounted elsewhere on this node;
+    workers caps the parsing processes (default: one per CPU).
+    """
+    # Imported here so planning and merging don't pay for loading the spaCy model
+    from entity_extraction import batch_parse, load_skills
+
+    manifest = load_manifest(manifest_path)
+    if not 0 <= shard < manifest["num_shards"]:
+        raise ValueError(f"Shard {shard} out of range for {manifest['num_shards']} shards")
+    input_dir = input_dir or Path(manifest["input_dir"])
+    out_dir = shard_dir(work_dir, shard)
+    text_dir = out_dir / "text"
+    # Start clean: texts left by an earlier plan would otherwise be parsed again, so CVs that
+    # moved to another shard or were deleted would stay in the ranking
+    shutil.rmtree(text_dir, ignore_errors=True)
+    for name in ("done.json", "entities.json", "vectors.json"):
+        (out_dir / name).unlink(missing_ok=True)
+    text_dir.mkdir(parents=True, exist_ok=True)
+
+    files = []
+    for entry in manifest["files"]:
+        if entry["shard"] != shard:
+            continue
+        file_path = input_dir / entry["file"]
+        if file_sha256(file_path) != entry["sha256"]:
+            raise ValueError(f"{file_path} changed since the manifest was planned; re-run plan")
+        files.append(file_path)
+
+    batch_extract(input_dir, text_dir, files=files)
+    entities_json = out_dir / "entities.json"
+    batch_parse(text_dir, entities_json, load_skills(vacancy_json), workers=workers)
+    vectorize.main(entities_json, vacancy_json, out_dir / "vectors.json")
+
+    (out_dir / "done.json").write_text(json.dumps({
+        "shard": shard,
+        "manifest_sha256": file_sha256(manifest_path),
+        "documents": len(files)
+    }, indent=2), encoding="utf-8")
+    print(f"Shard {shard}: processed {len(files)} documents -> {out_dir}")
+
+
+def merge_shards(manifest_path: Path, work_dir: Path, output_paths, components_path: Path = None,
+                 entities_paths=(), text_dir: Path = None, weights=None):
+    """
+    Combines the per-shard vectors into one vectors.json in work_dir and ranks all candidates.
+    entities_paths (e.g. outputs/entities.json and .parquet) receive the merged entities, and
+    text_dir is made to hold exactly the shards' CV texts, so the dashboard and incremental
+    updates see the same pool as the ranking.
+    Fails if any shard is missing or was produced from a different manifest.
+    """
+    manifest = load_manifest(manifest_path)
+    manifest_sha = file_sha256(manifest_path)
+    candidates = []
+    entities = []
+    vacancy = None
+    skill_set = None
+    for shard in range(manifest["num_shards"]):
+        out_dir = shard_dir(work_dir, shard)
+        done_path = out_dir / "done.json"
+        if not done_path.exists():
+            raise FileNotFoundError(f"Shard {shard} has not finished: {done_path} missing")
+        if json.loads(done_path.read_text(encoding="utf-8"))["manifest_sha256"] != manifest_sha:
+            raise ValueError(f"Shard {shard} was produced from a different manifest")
+        data = json.loads((out_dir / "vectors.json").read_text(encoding="utf-8"))
+        candidates.extend(data["candidates"])
+        if entities_paths:
+            entities.extend(read_rows(out_dir / "entities.json"))
+        # Every shard vectorises against the same vacancy, so the first one is representative
+        if vacancy is None:
+            vacancy, skill_set = data["vacancy"], data["skill_set"]
+
+    # Stable order across runs regardless of which shard finished first
+    candidates.sort(key=lambda c: c["file"])
+    merged_json = work_dir / "vectors.json"
+    merged_json.write_text(json.dumps({
+        "candidates": candidates,
+        "vacancy": vacancy or {},
+        "skill_set": skill_set or []
+    }, indent=2), encoding="utf-8")
+    print(f"Merged {len(candidates)} candidates from {manifest['num_shards']} shards -> {merged_json}")
+    entities.sort(key=lambda e: e["file"])
+    for path in entities_paths:
+        write_rows(entities, path, ENTITY_SCHEMA)
+    if text_dir:
+        sync_texts(work_dir, manifest["num_shards"], text_dir)
+    rank_candidates(merged_json, output_paths, components_path, weights)
+
+
+def sync_texts(work_dir: Path, num_shards: int, text_dir: Path):
+    """
+    Copies the shards' CV texts into text_dir and removes texts of CVs no longer in any shard.
+    """
+    text_dir.mkdir(parents=True, exist_ok=True)
+    keep = set()
+    for shard in range(num_shards):
+        for txt_path in (shard_dir(work_dir, shard) / "text").glob("*.txt"):
+            shutil.copy2(txt_path, text_dir / txt_path.name)
+            keep.add(txt_path.name)
+    for txt_path in text_dir.glob("*.txt"):
+        if txt_path.name not in keep:
+            txt_path.unlink()
+
+
+def run_local(input_dir: Path, num_shards: int, vacancy_json: Path, work_dir: Path, output_paths,
+              components_path: Path = None, profile_dir: Path = None, entities_paths=(), text_dir: Path = None,
+              weights=None, workers: int = None):
+    """
+    Plans, runs every shard as a separate local process (standing in for a node), then merges.
+    The shards run at the same time, so by default they share the CPUs: workers parsing
+    processes each, cpu_count // num_shards unless given.
+    """
+    workers = workers or max(1, (os.cpu_count() or 1) // num_shards)
+    manifest_path = work_dir / "manifest.json"
+    plan_shards(input_dir, num_shards, manifest_path)
+    script = Path(__file__).resolve()
+    workers = [
+        subprocess.Popen([
+            sys.executable, str(script), "work",
+            "--manifest", str(manifest_path),
+            "--shard", str(shard),
+            "--vacancy-json", str(vacancy_json),
+            "--work-dir", str(work_dir),
+            "--workers", str(workers)
+        ] + (["--profile", str(profile_dir)] if profile_dir else []))
+        for shard in range(num_shards)
+    ]
+    failed = [shard for shard, proc in enumerate(workers) if proc.wait() != 0]
+    if failed:
+        raise RuntimeError(f"Shards failed: {failed}")
+    merge_shards(manifest_path, work_dir, output_paths, components_path, entities_paths, text_dir, weights)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sharded batch processing: plan, work, merge")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_plan = sub.add_parser("plan", help="Partition the corpus into shards and write a manifest")
+    p_plan.add_argument("--input-dir", type=Path, required=True, help="Folder with PDF/DOCX files")
+    p_plan.add_argument("--shards", type=int, required=True, help="Number of shards")
+    p_plan.add_argument("--manifest", type=Path, required=True, help="Output manifest JSON")
+
+    p_work = sub.add_parser("work", help="Process a single shard")
+    p_work.add_argument("--manifest", type=Path, required=True)
+    p_work.add_argument("--shard", type=int, required=True)
+    p_work.add_argument("--vacancy-json", type=Path, required=True)
+    p_work.add_argument("--work-dir", type=Path, required=True, help="Shared folder for shard outputs")
+    p_work.add_argument("--input-dir", type=Path, help="Override the manifest's input folder on this node")
+    p_work.add_argument("--workers", type=int, help="Parsing processes for this shard (default: one per CPU)")
+    p_work.add_argument("--profile", type=Path, help="Optional: write cProfile/tracemalloc/stack samples here")
+
+    p_merge = sub.add_parser("merge", help="Merge shard outputs into one ranking")
+    p_merge.add_argument("--manifest", type=Path, required=True)
+    p_merge.add_argument("--work-dir", type=Path, required=True)
+    p_merge.add_argument("--output", type=Path, action="append", required=True,
+                         help="Ranking output (.parquet, .arrow or .csv); may be repeated")
+    p_merge.add_argument("--components", type=Path, help="Optional: save component scores here")
+    p_merge.add_argument("--entities", type=Path, action="append", default=[],
+                         help="Optional: save merged entities here (.json or .parquet); may be repeated")
+    p_merge.add_argument("--text-dir", type=Path, help="Optional: mirror the shards' CV texts into this folder")
+    p_merge.add_argument("--weights", type=str, default="",
+                         help="Score weights, e.g. 'skills=0.6,experience=0.2,education=0.2'")
+
+    p_local = sub.add_parser("run-local", help="Plan, run all shards as local processes, and merge")
+    p_local.add_argument("--input-dir", type=Path, required=True)
+    p_local.add_argument("--shards", type=int, required=True)
+    p_local.add_argument("--vacancy-json", type=Path, required=True)
+    p_local.add_argument("--work-dir", type=Path, required=True)
+    p_local.add_argument("--output", type=Path, action="append", required=True)
+    p_local.add_argument("--components", type=Path)
+    p_local.add_argument("--entities", type=Path, action="append", default=[])
+    p_local.add_argument("--text-dir", type=Path)
+    p_local.add_argument("--weights", type=str, default="")
+    p_local.add_argument("--workers", type=int, help="Parsing processes per shard (default: CPUs / shards)")
+    p_local.add_argument("--profile", type=Path, help="Optional: profile every shard into this folder")
+
+    args = parser.parse_args()
+    if args.command == "plan":
+        plan_shards(args.input_dir, args.shards, args.manifest)
+    elif args.command == "work":
+        with profile_stage(f"shard-{args.shard:04d}", args.profile):
+            run_shard(args.manifest, args.shard, args.vacancy_json, args.work_dir, args.input_dir, args.workers)
+    elif args.command == "merge":
+        merge_shards(args.manifest, args.work_dir, args.output, args.components, args.entities, args.text_dir,
+                     parse_weights(args.weights))
+    else:
+        run_local(args.input_dir, args.shards, args.vacancy_json, args.work_dir, args.output, args.components,
+                  args.profile, args.entities, args.text_dir, parse_weights(args.weights), args.workers)
@@ -0,0 +1,131 @@
+import ast
+import hashlib
+import json
+import os
+from pathlib import Path
+
+CACHE_VERSION = 1
+
+
+def module_closure(script: Path) -> list:
+    """
+    The script plus every sibling module it imports, transitively (e.g. scoring.py -> artifacts.py).
+    Together they form the stage's code version.
+    """
+    script = Path(script).resolve()
+    src_dir = script.parent
+    seen = set()
+    todo = [script]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                candidate = src_dir / f"{name.split('.')[0]}.py"
+                if candidate.exists():
+                    todo.append(candidate)
+    return sorted(seen)
+
+
+class StageCache:
+    """
+    Skips pipeline stages whose inputs, parameters and code are unchanged since the last run.
+    A stage's key is the hash of its input files/folders, its parameters and the source of the
+    modules it runs. The recorded output hashes must also still match, so outputs edited or
+    deleted outside the pipeline force a re-run. File hashes are memoised by (size, mtime).
+    """
+
+    def __init__(self, cache_path: Path, enabled: bool = True):
+        self.cache_path = Path(cache_path)
+        self.enabled = enabled
+        data = {}
+        if self.cache_path.exists():
+            try:
+                data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                data = {}
+        if data.get("version") != CACHE_VERSION:
+            data = {}
+        self.stages = data.get("stages", {})
+        self.old_hashes = data.get("files", {})
+        self.hashes = {}
+        self.results = []
+
+    def hash_file(self, path: Path) -> str:
+        key = str(path.resolve())
+        stat = path.stat()
+        memo = self.hashes.get(key) or self.old_hashes.get(key)
+        if memo and memo[0] == stat.st_size and memo[1] == stat.st_mtime_ns:
+            self.hashes[key] = memo
+            return memo[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        self.hashes[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def hash_path(self, path: Path):
+        """
+        Content hash of a file, or of a folder (relative names + file hashes); None if missing.
+        """
+        path = Path(path)
+        if path.is_file():
+            return self.hash_file(path)
+        if path.is_dir():
+            digest = hashlib.sha256()
+            for child in sorted(p for p in path.rglob("*") if p.is_file()):
+                digest.update(f"{child.relative_to(path).as_posix()}\0{self.hash_file(child)}\n".encode("utf-8"))
+            return digest.hexdigest()
+        return None
+
+    def stage_key(self, inputs, params, code) -> str:
+        payload = {
+            "inputs": {str(p): self.hash_path(p) for p in inputs},
+            "params": params,
+            "code": {Path(p).name: self.hash_file(Path(p)) for p in code}
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def run(self, name: str, func, inputs=(), outputs=(), params=None, code=()) -> bool:
+        """
+        Runs func() unless the stage is a cache hit. Returns True on a hit.
+        """
+        key = self.stage_key(inputs, params, code)
+        entry = self.stages.get(name)
+        if self.enabled and entry and entry["key"] == key and all(
+            self.hash_path(p) == entry["outputs"].get(str(p)) for p in outputs
+        ):
+            print(f"Cache hit: {name}")
+            self.results.append((name, True))
+            return True
+        func()
+        self.stages[name] = {"key": key, "outputs": {str(p): self.hash_path(p) for p in outputs}}
+        self.results.append((name, False))
+        self.save()
+        return False
+
+    def save(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(f".{self.cache_path.name}.tmp")
+        tmp_path.write_text(json.dumps({
+            "version": CACHE_VERSION,
+            "stages": self.stages,
+            "files": self.hashes
+        }, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.cache_path)
+
+    def report(self):
+        hits = [name for name, hit in self.results if hit]
+        misses = [name for name, hit in self.results if not hit]
+        print(f"Stage cache: {len(hits)} hit, {len(misses)} run")
+        for name, hit in self.results:
+            print(f"  {'hit' if hit else 'run'}  {name}")
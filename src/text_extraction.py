@@ -1,23 +1,133 @@
+import io
 import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from contextlib import nullcontext
 from pathlib import Path
 from pdfminer.high_level import extract_text as pdf_extract_text
-from docx import Document
+from profiling import document_timer, profile_stage
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
+def extract_text_from_pdf(pdf_path) -> str:
     """
-    Extracts text from a PDF file using pdfminer.six
+    Extracts text from a PDF file (path or binary file object) using pdfminer.six
     """
-    return pdf_extract_text(str(pdf_path))
+    return pdf_extract_text(pdf_path if hasattr(pdf_path, "read") else str(pdf_path))
 
 
-def extract_text_from_docx(docx_path: Path) -> str:
+# WordprocessingML namespaces, in ElementTree's {uri}tag form
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P = f"{_W}p"
+_W_T = f"{_W}t"
+_W_R = f"{_W}r"
+_W_PPR = f"{_W}pPr"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+# Run-level elements that stand for characters (w:tab also defines tab stops under w:pPr/w:tabs)
+_DOCX_CHARS = {f"{_W}tab": "\t", f"{_W}br": "\n", f"{_W}cr": "\n", f"{_W}noBreakHyphen": "-"}
+# Legacy Word 97-2003 .doc files are OLE compound documents, not zip packages
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+def _docx_part_order(name: str):
+    # Headers, then the body, then footers, as they read on the page
+    if name.startswith("word/header"):
+        return 0, name
+    if name == "word/document.xml":
+        return 1, name
+    return 2, name
+
+
+class _DocxTextTarget:
+    """
+    XMLParser target collecting paragraph text from one WordprocessingML part. No element tree
+    is built, so memory stays flat for any document size. Paragraphs in table cells and text boxes
+    are included (a text box's paragraphs come before the paragraph anchoring it); mc:Fallback
+    copies of text boxes are skipped so nothing is doubled.
+    """
+
+    def __init__(self):
+        self.open_paragraphs = []  # text boxes nest paragraphs inside paragraphs
+        self.finished = []
+        self.fallback_depth = 0
+        self.run_depth = 0  # a text box's runs sit inside the anchoring run
+        self.properties_depth = 0
+        self.in_text = False
+
+    def start(self, tag, attrib):
+        if tag == _MC_FALLBACK:
+            self.fallback_depth += 1
+        elif self.fallback_depth:
+            return
+        elif tag == _W_T:
+            self.in_text = True
+        elif tag == _W_P:
+            self.open_paragraphs.append([])
+        elif tag == _W_R:
+            self.run_depth += 1
+        elif tag == _W_PPR:
+            self.properties_depth += 1
+        elif tag in _DOCX_CHARS and self.run_depth and not self.properties_depth and self.open_paragraphs:
+            self.open_paragraphs[-1].append(_DOCX_CHARS[tag])
+
+    def end(self, tag):
+        if tag == _MC_FALLBACK:
+            self.fallback_depth -= 1
+        elif self.fallback_depth:
+            return
+        elif tag == _W_T:
+            self.in_text = False
+        elif tag == _W_P:
+            self.finished.append("".join(self.open_paragraphs.pop()))
+        elif tag == _W_R:
+            self.run_depth -= 1
+        elif tag == _W_PPR:
+            self.properties_depth -= 1
+
+    def data(self, text):
+        if self.in_text and not self.fallback_depth and self.open_paragraphs:
+            self.open_paragraphs[-1].append(text)
+
+    def close(self):
+        pass
+
+
+def _iter_docx_paragraphs(xml_stream, chunk_size: int = 1 << 16):
+    """
+    Feeds one XML part to the parser in chunks and yields paragraph texts in document order.
     """
-    Extracts text from a DOCX file using python-docx
+    target = _DocxTextTarget()
+    parser = ET.XMLParser(target=target)
+    for chunk in iter(lambda: xml_stream.read(chunk_size), b""):
+        parser.feed(chunk)
+        yield from target.finished
+        target.finished.clear()
+    parser.close()
+    yield from target.finished
+
+
+def extract_text_from_docx(docx_path) -> str:
     """
-    doc = Document(str(docx_path))
-    full_text = []
-    for para in doc.paragraphs:
-        full_text.append(para.text)
+    Extracts text from a DOCX file (path or binary file object) by streaming the header,
+    document and footer XML parts out of the zip. Paragraph, table and text box text is kept
+    in order. Raises ValueError for legacy binary .doc files, which aren't zip packages.
+    """
+    with open(docx_path, "rb") if not hasattr(docx_path, "read") else nullcontext(docx_path) as f:
+        if f.read(len(OLE_MAGIC)) == OLE_MAGIC:
+            raise ValueError("legacy binary Word .doc file; convert it to .docx or PDF")
+        f.seek(0)
+        try:
+            package = zipfile.ZipFile(f)
+        except zipfile.BadZipFile:
+            raise ValueError("not a DOCX file (invalid zip package)")
+        with package:
+            parts = sorted((name for name in package.namelist() if name == "word/document.xml"
+                            or re.fullmatch(r"word/(header|footer)\d*\.xml", name)), key=_docx_part_order)
+            if "word/document.xml" not in parts:
+                raise ValueError("not a DOCX file (word/document.xml missing)")
+            full_text = []
+            for name in parts:
+                with package.open(name) as xml_stream:
+                    full_text.extend(_iter_docx_paragraphs(xml_stream))
     return "\n".join(full_text)
 
 
@@ -30,20 +140,59 @@ def clean_text(text: str) -> str:
     return cleaned
 
 
-def batch_extract(input_dir: Path, output_dir: Path):
+SUPPORTED_SUFFIXES = {".pdf", ".docx", ".doc", ".txt"}
+
+
+def extract_text(file_path: Path) -> str:
+    """
+    Extracts raw text from a single PDF/DOCX/TXT file based on its suffix.
+    Returns None for unsupported file types.
+    """
+    suffix = file_path.suffix.lower()
+    if suffix == ".pdf":
+        return extract_text_from_pdf(file_path)
+    if suffix in [".docx", ".doc"]:
+        return extract_text_from_docx(file_path)
+    if suffix == ".txt":
+        return file_path.read_text(encoding="utf-8", errors="replace")
+    return None
+
+
+def extract_text_from_bytes(data, file_name: str) -> str:
     """
-    Walks through input_dir, converts PDFs and DOCXs to cleaned TXT files in output_dir.
+    Same as extract_text, for an in-memory document (bytes, or a memoryview such as an
+    uploaded file's getbuffer()); file_name only selects the format. Nothing touches disk.
+    """
+    suffix = Path(file_name).suffix.lower()
+    if suffix == ".pdf":
+        return extract_text_from_pdf(io.BytesIO(data))
+    if suffix in [".docx", ".doc"]:
+        return extract_text_from_docx(io.BytesIO(data))
+    if suffix == ".txt":
+        return bytes(data).decode("utf-8", errors="replace")
+    return None
+
+
+def batch_extract(input_dir: Path, output_dir: Path, files=None):
+    """
+    Walks through input_dir, converts PDFs, DOCXs (and raw TXTs) to cleaned TXT files in output_dir.
+    If files is given, only those paths are converted (used by sharded workers).
+    Files that can't be read are reported and skipped; returns their names.
     """
     output_dir.mkdir(parents=True, exist_ok=True)
-    for file_path in input_dir.iterdir():
+    failed = []
+    for file_path in (files if files is not None else input_dir.iterdir()):
         if not file_path.is_file():
             continue
-        text = None
-        if file_path.suffix.lower() == ".pdf":
-            text = extract_text_from_pdf(file_path)
-        elif file_path.suffix.lower() in [".docx", ".doc"]:
-            text = extract_text_from_docx(file_path)
-        else:
+        try:
+            with document_timer(file_path.name):
+                text = extract_text(file_path)
+        except Exception as e:
+            # One unreadable file (e.g. a legacy .doc) shouldn't stop the batch
+            print(f"Warning: could not extract {file_path.name}: {e}")
+            failed.append(file_path.name)
+            continue
+        if text is None:
             continue
 
         cleaned = clean_text(text)
@@ -51,14 +200,19 @@ def batch_extract(input_dir: Path, output_dir: Path):
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(cleaned)
         print(f"Converted {file_path.name} -> {output_file.name}")
+    if failed:
+        print(f"Skipped {len(failed)} unreadable files: {', '.join(failed)}")
+    return failed
 
 
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Batch-convert CVs and job posts to clean TXT")
-    parser.add_argument("--input-dir", type=Path, required=True, help="Path to folder with PDF/DOCX files")
+    parser.add_argument("--input-dir", type=Path, required=True, help="Path to folder with PDF/DOCX/TXT files")
     parser.add_argument("--output-dir", type=Path, required=True, help="Destination folder for TXT files")
+    parser.add_argument("--profile", type=Path, help="Optional: write cProfile/tracemalloc/stack samples here")
     args = parser.parse_args()
 
-    batch_extract(args.input_dir, args.output_dir)
+    with profile_stage(f"text_extraction-{args.input_dir.name}", args.profile):
+        batch_extract(args.input_dir, args.output_dir)
@@ -0,0 +1,190 @@
+import hashlib
+import importlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from vectorize import build_skill_set
+from profiling import document_timer, profile_stage
+
+# parser name -> (module, function); modules are imported on demand so the
+# rule-based parser works without the OpenAI client installed
+PARSERS = {
+    "gpt": ("gpt_vacancy_parser", "extract_vacancy_structure"),
+    "rules": ("vacancy_parsing", "extract_vacancy_requirements"),
+}
+
+INDEX_FILE = "index.json"
+
+
+def get_parser(parser: str):
+    """
+    Returns (parse_function, parser_version) for a parser name.
+    """
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown parser '{parser}', expected one of {sorted(PARSERS)}")
+    module_name, func_name = PARSERS[parser]
+    module = importlib.import_module(module_name)
+    return getattr(module, func_name), module.PARSER_VERSION
+
+
+def vacancy_id_for(path: Path) -> str:
+    """
+    Stable, filesystem-safe ID derived from the source file name, e.g. 'Vacancy.txt' -> 'vacancy'.
+    """
+    return re.sub(r"[^a-z0-9]+", "-", path.stem.lower()).strip("-") or "vacancy"
+
+
+def parse_key(text: str, parser: str, parser_version: str) -> str:
+    """
+    Cache key for a parsed vacancy: changes when the text, parser or parser version changes.
+    """
+    digest = hashlib.sha256(f"{parser}:{parser_version}\n".encode("utf-8"))
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_index(library_dir: Path) -> dict:
+    index_path = library_dir / INDEX_FILE
+    if not index_path.exists():
+        return {}
+    return json.loads(index_path.read_text(encoding="utf-8"))
+
+
+def vacancy_path(library_dir: Path, vacancy_id: str) -> Path:
+    """
+    Path of a stored vacancy. The file has the same fields as vacancy.json (plus 'vacancy_id'
+    and the compiled 'skill_set'), so any stage taking --vacancy-json / --skills-file can use it.
+    """
+    path = Path(library_dir) / f"{vacancy_id}.json"
+    if not path.exists():
+        known = ", ".join(sorted(load_index(Path(library_dir)))) or "none"
+        raise KeyError(f"Vacancy '{vacancy_id}' not in library {library_dir} (known: {known})")
+    return path
+
+
+def load_vacancy(library_dir: Path, vacancy_id: str) -> dict:
+    return json.loads(vacancy_path(library_dir, vacancy_id).read_text(encoding="utf-8"))
+
+
+def sync_library(text_dir: Path, library_dir: Path, parser: str = "gpt", workers: int = 4,
+                 prune: bool = False) -> dict:
+    """
+    Parses every vacancy .txt in text_dir into the library, skipping postings whose text,
+    parser and parser version are unchanged since the last sync. New or edited postings are
+    parsed concurrently (threads, since the GPT parser is network-bound).
+    Returns the updated index.
+    """
+    library_dir.mkdir(parents=True, exist_ok=True)
+    parse, parser_version = get_parser(parser)
+    index = load_index(library_dir)
+
+    todo = []
+    seen = set()
+    for txt_path in sorted(text_dir.glob("*.txt")):
+        vacancy_id = vacancy_id_for(txt_path)
+        if vacancy_id in seen:
+            print(f"Warning: {txt_path.name} maps to duplicate vacancy ID '{vacancy_id}', skipped")
+            continue
+        seen.add(vacancy_id)
+        text = txt_path.read_text(encoding="utf-8")
+        key = parse_key(text, parser, parser_version)
+        entry = index.get(vacancy_id)
+        if entry and entry["key"] == key and (library_dir / entry["file"]).exists():
+            continue
+        todo.append((vacancy_id, txt_path, text, key))
+
+    def parse_one(item):
+        vacancy_id, txt_path, text, key = item
+        with document_timer(txt_path.name):
+            reqs = parse(text)
+        record = {
+            "vacancy_id": vacancy_id,
+            **reqs,
+            "skill_set": sorted(build_skill_set([], reqs))
+        }
+        (library_dir / f"{vacancy_id}.json").write_text(
+            json.dumps(record, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        return vacancy_id, {
+            "file": f"{vacancy_id}.json",
+            "source": txt_path.name,
+            "key": key,
+            "parser": parser,
+            "parser_version": parser_version
+        }
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [(item[0], executor.submit(parse_one, item)) for item in todo]
+        for vacancy_id, future in futures:
+            try:
+                _, entry = future.result()
+                index[vacancy_id] = entry
+                print(f"Parsed vacancy {entry['source']} -> {vacancy_id}")
+            except Exception as e:
+                failed.append(vacancy_id)
+                print(f"Warning: could not parse vacancy '{vacancy_id}': {e}")
+
+    if prune:
+        for vacancy_id in sorted(set(index) - seen):
+            (library_dir / index.pop(vacancy_id)["file"]).unlink(missing_ok=True)
+            print(f"Pruned vacancy {vacancy_id}")
+
+    (library_dir / INDEX_FILE).write_text(json.dumps(index, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Vacancy library: {len(index)} vacancies, {len(todo) - len(failed)} parsed, "
+          f"{len(seen) - len(todo)} unchanged -> {library_dir}")
+    if failed:
+        raise RuntimeError(f"Failed to parse vacancies: {failed}")
+    return index
+
+
+def export_vacancy(library_dir: Path, vacancy_id: str, output_json: Path):
+    """
+    Copies one stored vacancy to output_json (e.g. outputs/vacancy.json) without re-parsing.
+    """
+    output_json.write_text(json.dumps(load_vacancy(library_dir, vacancy_id), indent=2, ensure_ascii=False),
+                           encoding="utf-8")
+    print(f"Vacancy '{vacancy_id}' -> {output_json}")
+
+
+def resolve_vacancy_json(vacancy_json: Path = None, library_dir: Path = None, vacancy_id: str = None) -> Path:
+    """
+    Shared CLI helper: a vacancy is given either as a JSON file or as an ID in the library.
+    """
+    if vacancy_id:
+        return vacancy_path(library_dir or Path("outputs/vacancies"), vacancy_id)
+    return vacancy_json
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the parsed vacancy library")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_sync = sub.add_parser("sync", help="Parse new or edited vacancy texts into the library")
+    p_sync.add_argument("--text-dir", type=Path, required=True, help="Folder with vacancy .txt files")
+    p_sync.add_argument("--library", type=Path, required=True, help="Library folder")
+    p_sync.add_argument("--parser", choices=sorted(PARSERS), default="gpt")
+    p_sync.add_argument("--workers", type=int, default=4, help="Vacancies parsed concurrently")
+    p_sync.add_argument("--prune", action="store_true", help="Drop vacancies whose text file is gone")
+    p_sync.add_argument("--profile", type=Path, help="Optional: write cProfile/tracemalloc/stack samples here")
+
+    p_list = sub.add_parser("list", help="List stored vacancies")
+    p_list.add_argument("--library", type=Path, required=True)
+
+    p_export = sub.add_parser("export", help="Write one stored vacancy to a JSON file")
+    p_export.add_argument("--library", type=Path, required=True)
+    p_export.add_argument("--id", required=True, help="Vacancy ID")
+    p_export.add_argument("--output", type=Path, required=True)
+
+    args = parser.parse_args()
+    if args.command == "sync":
+        with profile_stage("vacancy_library", args.profile):
+            sync_library(args.text_dir, args.library, args.parser, args.workers, args.prune)
+    elif args.command == "list":
+        for vacancy_id, entry in sorted(load_index(args.library).items()):
+            print(f"{vacancy_id}\t{entry['source']}\t{entry['parser']} {entry['parser_version']}")
+    else:
+        export_vacancy(args.library, args.id, args.output)
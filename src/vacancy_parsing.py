@@ -2,6 +2,9 @@ import re
 import json
 from pathlib import Path
 
+# Bump when the extraction rules change so cached vacancy parses are invalidated
+PARSER_VERSION = "1"
+
 def extract_vacancy_requirements(text: str) -> dict:
     """
     Extracts required skills, nice-to-have skills, minimum years of experience,
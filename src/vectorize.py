@@ -1,5 +1,7 @@
 import json
 from pathlib import Path
+from artifacts import read_rows
+from profiling import profile_stage
 
 
 def load_json(path: Path):
@@ -61,7 +63,8 @@ def vectorize_vacancy(vacancy_reqs, skill_set):
 
 
 def main(entities_json: Path, vacancy_json: Path, output: Path):
-    entities = load_json(entities_json)
+    # Entities may be the JSON list or a columnar (.parquet/.arrow) entities table
+    entities = read_rows(entities_json)
     vacancy_reqs = load_json(vacancy_json)
 
     skill_set = build_skill_set(entities, vacancy_reqs)
@@ -81,9 +84,17 @@ def main(entities_json: Path, vacancy_json: Path, output: Path):
 
 if __name__ == '__main__':
     import argparse
+    from vacancy_library import resolve_vacancy_json
     parser = argparse.ArgumentParser(description='Vectorize candidates and vacancy')
     parser.add_argument('--entities-json', type=Path, required=True)
-    parser.add_argument('--vacancy-json', type=Path, required=True)
+    parser.add_argument('--vacancy-json', type=Path)
+    parser.add_argument('--vacancy-library', type=Path, help='Vacancy library folder (with --vacancy-id)')
+    parser.add_argument('--vacancy-id', type=str, help='Use this vacancy from the library instead of --vacancy-json')
     parser.add_argument('--output-json', type=Path, required=True)
+    parser.add_argument('--profile', type=Path, help='Optional: write cProfile/tracemalloc/stack samples here')
     args = parser.parse_args()
-    main(args.entities_json, args.vacancy_json, args.output_json)
+    vacancy_json = resolve_vacancy_json(args.vacancy_json, args.vacancy_library, args.vacancy_id)
+    if not vacancy_json:
+        parser.error('one of --vacancy-json or --vacancy-id is required')
+    with profile_stage('vectorize', args.profile):
+        main(args.entities_json, vacancy_json, args.output_json)